@@ -0,0 +1,64 @@
+""" Measure the memory used by the actions registered in a context,
+with ``Action`` instances with and without a ``__dict__``.
+
+Usage: python benchmarks/bench_actions.py [number_of_actions ...]
+
+Each measurement runs in a fresh process and reports the growth of its
+resident set size (Linux only).
+"""
+import multiprocessing
+import sys
+
+from repoze.configuration import context as context_module
+from repoze.configuration.declaration import PythonDeclaration
+
+class DictAction(object):
+    # Action as it was before it had __slots__
+    def __init__(self, discriminator, callback, declaration, depends=None):
+        self.discriminator = discriminator
+        self.callback = callback
+        self.declaration = declaration
+        self.depends = depends
+
+def rss():
+    f = open('/proc/self/statm')
+    try:
+        pages = int(f.read().split()[1])
+    finally:
+        f.close()
+    import resource
+    return pages * resource.getpagesize()
+
+def noop():
+    pass
+
+def measure(args):
+    count, use_dict = args
+    if use_dict:
+        context_module.Action = DictAction
+    context = context_module.Context()
+    # one declaration shared by every action: only the action table
+    # itself is measured
+    declaration = PythonDeclaration(context)
+    discriminators = [ ('route', i) for i in xrange(count) ]
+    before = rss()
+    for discriminator in discriminators:
+        context.action(declaration, noop, discriminator)
+    return rss() - before
+
+def main(argv=sys.argv):
+    counts = [ int(arg) for arg in argv[1:] ] or [100000, 1000000]
+    pool = multiprocessing.Pool(1, maxtasksperchild=1)
+    try:
+        for count in counts:
+            with_dict = pool.apply(measure, ((count, True),))
+            with_slots = pool.apply(measure, ((count, False),))
+            print '%8d actions: __dict__ %7.1fMB  __slots__ %7.1fMB' % (
+                count, with_dict / 1048576.0, with_slots / 1048576.0),
+            print '(%.0f%%)' % (100.0 * with_slots / with_dict)
+    finally:
+        pool.close()
+        pool.join()
+
+if __name__ == '__main__':
+    main()
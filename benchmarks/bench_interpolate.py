@@ -0,0 +1,69 @@
+""" Compare compiled interpolation templates with the regex-substitution
+interpolation used previously, for strings with and without
+``%(name)s`` markers.
+
+Usage: python benchmarks/bench_interpolate.py [number_of_strings]
+"""
+import re
+import sys
+import time
+
+from repoze.configuration.context import Context
+
+_INTERP = re.compile(r"%\(([^)]*)\)s")
+
+def regex_interpolate(context, value):
+    # the implementation Context.interpolate had before templates
+    def _interpolation_replace(match):
+        s = match.group(1)
+        if s in context:
+            return context[s]
+        if context.stack and s in context.stack[-1]:
+            return context.stack[-1][s]
+        raise KeyError(s)
+    if '%(' in value:
+        value = _INTERP.sub(_interpolation_replace, value)
+    return value.encode('utf-8')
+
+def make_strings(count, marked):
+    # YAML loaders produce a distinct string object for each scalar,
+    # but configuration files repeat the same values over and over
+    strings = []
+    for i in range(count):
+        if marked:
+            value = u'%%(here)s/static/%d/%%(name)s' % (i % 100)
+        else:
+            value = u'static/%d/resource' % (i % 100)
+        strings.append(value[:])
+    return strings
+
+def best_of(interpolate, strings, repeat=5):
+    best = None
+    for i in range(repeat):
+        context = Context({'name':'app'})
+        context.stack.append({'here':'/here', 'override':False})
+        start = time.time()
+        for value in strings:
+            interpolate(context, value)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def compiled_interpolate(context, value):
+    return context.interpolate(value)
+
+def main(argv=sys.argv):
+    count = 100000
+    if len(argv) > 1:
+        count = int(argv[1])
+    print 'Interpolating %d strings' % count
+    for label, marked in (('without markers', False), ('with markers', True)):
+        strings = make_strings(count, marked)
+        regex_time = best_of(regex_interpolate, strings)
+        compiled_time = best_of(compiled_interpolate, strings)
+        print '%-16s regex %7.3fs  compiled %7.3fs (%.1fx)' % (
+            label, regex_time, compiled_time, regex_time / compiled_time)
+
+if __name__ == '__main__':
+    main()
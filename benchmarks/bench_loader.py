@@ -0,0 +1,64 @@
+""" Compare the pure-Python and LibYAML-based directive loaders.
+
+Usage: python benchmarks/bench_loader.py [number_of_directives]
+"""
+import StringIO
+import sys
+import time
+
+from repoze.configuration.context import Context
+from repoze.configuration.loader import CYAMLPluginLoader
+from repoze.configuration.loader import YAMLPluginLoader
+
+def setting(declaration):
+    declaration.structure
+
+class SettingPoint(object):
+    name = 'setting'
+    def load(self):
+        return setting
+
+def iter_entry_points(group):
+    yield SettingPoint()
+
+def make_config(count):
+    lines = []
+    for i in range(count):
+        lines.append('--- !setting')
+        lines.append('name: setting%d' % i)
+        lines.append('value: "%%(here)s/value%d"' % i)
+        lines.append('enabled: true')
+        lines.append('items: [a, b, c, %d]' % i)
+    return '\n'.join(lines) + '\n'
+
+def best_of(loader_class, text, repeat=5):
+    best = None
+    for i in range(repeat):
+        context = Context()
+        context.stack.append({'here':'/here', 'override':False})
+        stream = StringIO.StringIO(text)
+        stream.name = 'bench.yml'
+        start = time.time()
+        loader_class(context, stream, iter_entry_points)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main(argv=sys.argv):
+    count = 5000
+    if len(argv) > 1:
+        count = int(argv[1])
+    text = make_config(count)
+    print 'Loading %d directives (%d bytes)' % (count, len(text))
+    python_time = best_of(YAMLPluginLoader, text)
+    print '%-20s %8.3fs' % ('YAMLPluginLoader', python_time)
+    if CYAMLPluginLoader is None:
+        print 'CYAMLPluginLoader    unavailable (PyYAML built without libyaml)'
+        return
+    c_time = best_of(CYAMLPluginLoader, text)
+    print '%-20s %8.3fs (%.1fx)' % ('CYAMLPluginLoader', c_time,
+                                   python_time / c_time)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+""" Compare a compiled ``Schema`` with the chained declaration accessors
+(``expect``, then ``string``, ``boolean`` and ``integer`` once per key)
+on directive structures with a growing number of keys.
+
+Usage: python benchmarks/bench_schema.py [number_of_declarations]
+"""
+import sys
+import time
+
+from repoze.configuration.declaration import PythonDeclaration
+from repoze.configuration.schema import Boolean
+from repoze.configuration.schema import Integer
+from repoze.configuration.schema import Schema
+from repoze.configuration.schema import String
+
+KINDS = ('string', 'boolean', 'integer')
+
+def make_structure(keys):
+    structure = {}
+    for i in range(keys):
+        kind = KINDS[i % 3]
+        if kind == 'string':
+            structure['key%d' % i] = 'value%d' % i
+        elif kind == 'boolean':
+            structure['key%d' % i] = 'true'
+        else:
+            structure['key%d' % i] = str(i)
+    return structure
+
+def make_schema(keys):
+    fields = []
+    for i in range(keys):
+        factory = (String, Boolean, Integer)[i % 3]
+        fields.append(factory('key%d' % i))
+    return Schema(*fields)
+
+def make_accessors(keys):
+    names = [ 'key%d' % i for i in range(keys) ]
+    def accessors(declaration):
+        declaration.expect(dict, names=names)
+        result = {}
+        for i, name in enumerate(names):
+            result[name] = getattr(declaration, KINDS[i % 3])(name)
+        return result
+    return accessors
+
+def best_of(validate, declarations, repeat=5):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        for declaration in declarations:
+            validate(declaration)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main(argv=sys.argv):
+    count = 20000
+    if len(argv) > 1:
+        count = int(argv[1])
+    print 'Validating %d declarations' % count
+    for keys in (3, 10, 30):
+        structure = make_structure(keys)
+        declarations = [ PythonDeclaration(None, **structure)
+                         for i in range(count) ]
+        accessors_time = best_of(make_accessors(keys), declarations)
+        schema_time = best_of(make_schema(keys).validate, declarations)
+        print '%2d keys  accessors %7.3fs  schema %7.3fs (%.1fx)' % (
+            keys, accessors_time, schema_time, accessors_time / schema_time)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+""" Time loading, executing, interpolation, dotted name resolution and
+ImperativeConfig dispatch over synthetic configuration trees, and
+importing the package.
+
+Usage: python benchmarks/suite.py [options] [benchmark ...]
+
+Pass ``--save baseline.json`` to record the results and ``--compare
+baseline.json`` on a later run to flag benchmarks which got slower by
+more than ``--threshold`` (10% by default); the exit status is 1 if any
+did.  Timings are the best of ``--repeat`` runs.
+"""
+import json
+import optparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import treegen
+
+from repoze.configuration.context import Context
+from repoze.configuration.directives import include
+from repoze.configuration.imperative import ImperativeConfig
+from repoze.configuration.loader import DefaultLoader
+
+def noop():
+    pass
+
+def setting(declaration):
+    structure = declaration.structure
+    declaration.action(noop, discriminator=('setting', structure['name']))
+
+def handler(declaration):
+    structure = declaration.structure
+    callable = declaration.resolve(structure['callable'])
+    declaration.action(noop, discriminator=('handler', structure['name']))
+
+class Point(object):
+    def __init__(self, name, directive):
+        self.name = name
+        self.directive = directive
+
+    def load(self):
+        return self.directive
+
+POINTS = [Point('include', include), Point('setting', setting),
+          Point('handler', handler)]
+
+def iter_entry_points(group):
+    return iter(POINTS)
+
+def loader(context, stream, **kw):
+    return DefaultLoader(context, stream, iter_entry_points, **kw)
+
+def make_context():
+    context = Context(dict([ ('var%d' % n, 'v%d' % n) for n in range(10) ]),
+                      _loader=loader)
+    context.directives = dict([ ('!' + point.name, point.directive)
+                                for point in POINTS ])
+    return context
+
+def best_of(repeat, setup, run):
+    best = None
+    for i in range(repeat):
+        arg = setup()
+        start = time.time()
+        run(arg)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+class Suite(object):
+    def __init__(self, directory, directives, repeat):
+        self.directory = directory
+        self.directives = directives
+        self.repeat = repeat
+
+    def tree(self, name, **kw):
+        return treegen.generate(os.path.join(self.directory, name),
+                                self.directives, **kw)
+
+    def time_load(self, root):
+        def run(context):
+            context.load(root, None)
+        return best_of(self.repeat, make_context, run)
+
+    def bench_load_wide(self):
+        return self.time_load(self.tree('wide', files=100))
+
+    def bench_load_deep(self):
+        return self.time_load(self.tree('deep', files=50, depth=50))
+
+    def bench_load_interpolation(self):
+        return self.time_load(self.tree('interpolation', files=10,
+                                        interpolations=5))
+
+    def bench_load_handlers(self):
+        return self.time_load(self.tree('handlers', files=10, handlers=1.0))
+
+    def bench_execute(self):
+        root = self.tree('wide', files=100)
+        def setup():
+            context = make_context()
+            context.load(root, None)
+            return context
+        def run(context):
+            context.execute()
+        return best_of(self.repeat, setup, run)
+
+    def bench_interpolate(self):
+        values = []
+        for i in range(self.directives):
+            if i % 2:
+                values.append(u'%%(here)s/%%(var%d)s/%d' % (i % 10, i % 100))
+            else:
+                values.append(u'literal/%d' % (i % 100))
+        def setup():
+            context = make_context()
+            context.stack.append({'here':'/here'})
+            return context
+        def run(context):
+            for value in values:
+                context.interpolate(value)
+        return best_of(self.repeat, setup, run)
+
+    def bench_resolve(self):
+        names = treegen.DOTTED_NAMES
+        count = len(names)
+        def run(context):
+            for i in range(self.directives):
+                context.resolve(names[i % count])
+        return best_of(self.repeat, make_context, run)
+
+    def bench_imperative(self):
+        def setup():
+            return ImperativeConfig(make_context(), iter_entry_points)
+        def run(config):
+            for i in range(self.directives):
+                config.setting(name='setting%d' % i, value=i)
+        return best_of(self.repeat, setup, run)
+
+    def bench_imperative_apply(self):
+        records = [ ('setting', {'name':'setting%d' % i, 'value':i})
+                    for i in range(self.directives) ]
+        def setup():
+            return ImperativeConfig(make_context(), iter_entry_points)
+        def run(config):
+            config.apply(records)
+        return best_of(self.repeat, setup, run)
+
+    def bench_import(self):
+        # a fresh interpreter each run; includes interpreter startup
+        def run(arg):
+            subprocess.check_call([sys.executable, '-c',
+                                   'import repoze.configuration'])
+        return best_of(self.repeat, lambda: None, run)
+
+    def names(self):
+        return sorted([ name[6:] for name in dir(self)
+                        if name.startswith('bench_') ])
+
+    def run(self, name):
+        return getattr(self, 'bench_' + name)()
+
+def compare(results, baseline, threshold):
+    """ Return the names of the benchmarks in ``results`` more than
+    ``threshold`` (a fraction) slower than in ``baseline`` """
+    regressions = []
+    for name, elapsed in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous and elapsed > previous * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+def main(argv=sys.argv):
+    names = Suite(None, 0, 0).names()
+    parser = optparse.OptionParser(
+        usage='%%prog [options] [benchmark ...]\n\nBenchmarks: %s' %
+        ', '.join(names))
+    parser.add_option('-n', '--directives', type='int', default=10000,
+                      help='number of directives per benchmark')
+    parser.add_option('-r', '--repeat', type='int', default=3,
+                      help='number of runs of each benchmark')
+    parser.add_option('--save', metavar='FILE',
+                      help='save the results as a baseline')
+    parser.add_option('--compare', metavar='FILE',
+                      help='compare the results with a saved baseline')
+    parser.add_option('--threshold', type='float', default=0.1,
+                      help='slowdown flagged as a regression')
+    options, args = parser.parse_args(argv[1:])
+
+    baseline = {}
+    if options.compare:
+        f = open(options.compare)
+        try:
+            baseline = json.load(f)['results']
+        finally:
+            f.close()
+
+    directory = tempfile.mkdtemp()
+    try:
+        suite = Suite(directory, options.directives, options.repeat)
+        names = args or suite.names()
+        results = {}
+        for name in names:
+            elapsed = results[name] = suite.run(name)
+            line = '%-20s %8.3fs' % (name, elapsed)
+            previous = baseline.get(name)
+            if previous:
+                line += ' (%+.1f%%)' % ((elapsed / previous - 1) * 100)
+            print line
+    finally:
+        shutil.rmtree(directory)
+
+    if options.save:
+        f = open(options.save, 'w')
+        try:
+            json.dump({'directives':options.directives, 'results':results},
+                      f, indent=2, sort_keys=True)
+        finally:
+            f.close()
+
+    regressions = compare(results, baseline, options.threshold)
+    if regressions:
+        print 'Regressions: %s' % ', '.join(regressions)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
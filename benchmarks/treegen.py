@@ -0,0 +1,93 @@
+""" Generate synthetic configuration trees for the benchmarks.
+
+Usage: python benchmarks/treegen.py directory [number_of_directives]
+"""
+import os
+import sys
+
+# dotted names resolved by the ``!handler`` directive of generated trees
+DOTTED_NAMES = [
+    'os.path:join', 'os.path:dirname', 'os.path:basename', 'os:getcwd',
+    'string:Template', 'StringIO:StringIO', 'copy:deepcopy',
+    'repoze.configuration.context:Context',
+    'repoze.configuration.declaration:YAMLDeclaration',
+    'repoze.configuration.resolver:resolve_dotted',
+    ]
+
+def setting_document(i, interpolations=0):
+    lines = ['--- !setting', 'name: setting%d' % i]
+    if interpolations:
+        value = '/'.join(['%(here)s'] + ['%%(var%d)s' % (n % 10)
+                                         for n in range(interpolations)])
+        lines.append('value: "%s/%d"' % (value, i))
+    else:
+        lines.append('value: "value%d"' % i)
+    lines.append('items: [a, b, c, %d]' % i)
+    return '\n'.join(lines)
+
+def handler_document(i):
+    return '\n'.join(['--- !handler', 'name: handler%d' % i,
+                      'callable: %s' % DOTTED_NAMES[i % len(DOTTED_NAMES)]])
+
+def include_document(filename):
+    return '--- !include\nfilename: "%%(here)s/%s"' % filename
+
+def write(directory, filename, documents):
+    f = open(os.path.join(directory, filename), 'w')
+    f.write('\n'.join(documents) + '\n')
+    f.close()
+
+def generate(directory, directives=10000, files=1, depth=1,
+             interpolations=0, handlers=0.0):
+    """ Write a tree of configuration files containing ``directives``
+    directives in ``directory`` and return the absolute filename of its
+    root.
+
+    - files: the number of files the directives are spread over
+
+    - depth: the include depth of the tree.  With a depth of one, the
+      root includes every other file (a wide tree); otherwise the files
+      form ``files / depth`` chains of includes (a deep tree).
+
+    - interpolations: the number of ``%(name)s`` markers in each
+      setting value (``var0`` to ``var9`` and ``here``)
+
+    - handlers: the fraction of directives which resolve a dotted name
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    names = [ 'file%d.yml' % n for n in range(files) ]
+    per_file = directives // files
+    handler_every = handlers and int(round(1 / handlers)) or 0
+    counter = 0
+    chains = max(1, files // max(1, depth))
+    for n, name in enumerate(names):
+        documents = []
+        for j in range(per_file):
+            if handler_every and counter % handler_every == 0:
+                documents.append(handler_document(counter))
+            else:
+                documents.append(setting_document(counter, interpolations))
+            counter += 1
+        if depth > 1 and n + chains < files:
+            documents.append(include_document(names[n + chains]))
+        write(directory, name, documents)
+    if depth > 1:
+        roots = names[:chains]
+    else:
+        roots = names
+    write(directory, 'configure.yml', [ include_document(name)
+                                        for name in roots ])
+    return os.path.abspath(os.path.join(directory, 'configure.yml'))
+
+def main(argv=sys.argv):
+    if len(argv) < 2:
+        print __doc__
+        return 1
+    directives = 10000
+    if len(argv) > 2:
+        directives = int(argv[2])
+    print generate(argv[1], directives, files=10)
+
+if __name__ == '__main__':
+    sys.exit(main())
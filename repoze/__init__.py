@@ -1 +1,9 @@
-__import__('pkg_resources').declare_namespace(__name__)
+# a namespace package; pkgutil is used rather than pkg_resources, which
+# is slow to import
+import sys
+from pkgutil import extend_path
+__path__ = extend_path(__path__, __name__)
+if 'pkg_resources' in sys.modules:
+    # already imported: let it find portions pkgutil can't (e.g. in
+    # zipped eggs)
+    sys.modules['pkg_resources'].declare_namespace(__name__)
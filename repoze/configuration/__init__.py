@@ -1,8 +1,12 @@
 from repoze.configuration.exceptions import ConfigurationError # API
 from repoze.configuration.exceptions import ConfigurationConflict # API
+from repoze.configuration.exceptions import ConfigurationExecutionError # API
+from repoze.configuration.exceptions import ConfigurationConflicts # API
+from repoze.configuration.exceptions import ConfigurationIncludeCycle # API
 from repoze.configuration.context import Context # API
 
-def load(filename='configure.yml', package=None, context=None, loader=None):
+def load(filename='configure.yml', package=None, context=None, loader=None,
+         cache=None, processes=None):
     """
     You can load configuration without executing it (without calling
     any callbacks) by using the ``load`` function.  ``load`` accepts a
@@ -27,11 +31,48 @@ def load(filename='configure.yml', package=None, context=None, loader=None):
     arguments passed to this function.
     """
     if context is None:
-        context = Context(_loader=loader)
+        if processes is not None:
+            from repoze.configuration.parallel import ParallelParser
+            parser = ParallelParser(processes, cache)
+            context = Context(_loader=loader, _cache=parser)
+            try:
+                context.load(filename, package)
+            finally:
+                parser.close()
+                context.cache = cache
+            return context
+        context = Context(_loader=loader, _cache=cache)
     context.load(filename, package)
     return context
 
-def execute(filename='configure.yml', package=None, context=None, loader=None):
+def iterload(filename='configure.yml', package=None, context=None,
+             loader=None):
+    """
+    Parse configuration without calling any directives, yielding a
+    ``(tag, structure, span, depth)`` tuple for each directive as it is
+    parsed.  This is useful for tools which only inspect configuration
+    (linters, inventories and the like).
+
+    .. code-block:: python
+       :linenos:
+
+       >>> from repoze.configuration import iterload
+       >>> for tag, structure, span, depth in iterload('/path/to/configure.yml'):
+       ...     print '  ' * depth, tag, span[0]
+
+    ``span`` is a ``(filename, start_index, end_index, start_line,
+    end_line)`` tuple locating the directive, and ``depth`` is the
+    include depth of the file it was found in.  Included files are
+    parsed lazily, right after their ``!include`` is yielded, and only
+    the YAML document being parsed in each file is held in memory.
+    See ``Context.iterload``.
+    """
+    if context is None:
+        context = Context(_loader=loader)
+    return context.iterload(filename, package)
+
+def execute(filename='configure.yml', package=None, context=None, loader=None,
+            cache=None, processes=None):
     """
     ``execute`` loads the configuration, executes the actions implied
     by the configuration, and returns a context.  After successful
@@ -55,8 +96,20 @@ def execute(filename='configure.yml', package=None, context=None, loader=None):
        >>> from repoze.configuration import load
        >>> import somepackage
        >>> context = execute('configure.yml', package=somepackge)
+
+    If ``cache`` is a ``repoze.configuration.cache.ParseCache``, the
+    declarations parsed out of each configuration file are stored in
+    it, and subsequent loads of an unchanged file replay them without
+    parsing the file again.
+
+    If ``processes`` is not ``None``, included configuration files are
+    parsed in a pool of that many worker processes (``0`` means one
+    per CPU) while directives are called, in order, in this process.
+    See ``repoze.configuration.parallel.ParallelParser``.
+
+    ``cache`` and ``processes`` are ignored if ``context`` is passed.
     """
-    context = load(filename, package, context, loader)
+    context = load(filename, package, context, loader, cache, processes)
     context.execute()
     return context
 
@@ -0,0 +1,105 @@
+import sys
+import threading
+
+import repoze.configuration
+
+class Future(object):
+    """ The eventual result of a load or execution started by ``load``
+    or ``execute``.  Callables added with ``add_done_callback`` are
+    called with the future, in the thread which finished it (or
+    immediately, if it is already done); an event loop should use them
+    to hand the result over to its own thread (for example with
+    Twisted's ``reactor.callFromThread`` or Tornado's
+    ``IOLoop.add_callback``)."""
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._result = None
+        self._exc_info = None
+
+    def done(self):
+        """ Return true if the load or execution has finished """
+        return self._event.isSet()
+
+    def result(self, timeout=None):
+        """ Wait up to ``timeout`` seconds (forever if it is ``None``)
+        and return the context, or raise the exception loading or
+        executing it raised.  Raise ``RuntimeError`` if it hasn't
+        finished in time."""
+        self._event.wait(timeout)
+        if not self._event.isSet():
+            raise RuntimeError('not done')
+        if self._exc_info is not None:
+            typ, value, tb = self._exc_info
+            raise typ, value, tb
+        return self._result
+
+    def exception(self, timeout=None):
+        """ Wait like ``result`` and return the exception raised, or
+        ``None``."""
+        self._event.wait(timeout)
+        if not self._event.isSet():
+            raise RuntimeError('not done')
+        if self._exc_info is not None:
+            return self._exc_info[1]
+
+    def add_done_callback(self, fn):
+        self._lock.acquire()
+        try:
+            if not self._event.isSet():
+                self._callbacks.append(fn)
+                return
+        finally:
+            self._lock.release()
+        fn(self)
+
+    def _finish(self, result=None, exc_info=None):
+        self._lock.acquire()
+        try:
+            self._result = result
+            self._exc_info = exc_info
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        finally:
+            self._lock.release()
+        for fn in callbacks:
+            fn(self)
+
+def _start(function, *arg):
+    future = Future()
+    def run():
+        try:
+            result = function(*arg)
+        except BaseException:
+            # even SystemExit or KeyboardInterrupt: result() would
+            # otherwise wait forever
+            future._finish(exc_info=sys.exc_info())
+        else:
+            future._finish(result)
+    thread = threading.Thread(target=run)
+    thread.setDaemon(True)
+    thread.start()
+    return future
+
+def load(filename='configure.yml', package=None, context=None, loader=None,
+         cache=None, processes=None):
+    """ Like ``repoze.configuration.load``, but read and parse the
+    configuration in a background thread.  Return a ``Future`` for the
+    context right away."""
+    return _start(repoze.configuration.load, filename, package, context,
+                  loader, cache, processes)
+
+def execute(filename='configure.yml', package=None, context=None, loader=None,
+            cache=None, processes=None, workers=None):
+    """ Like ``repoze.configuration.execute``, but load the
+    configuration and execute its actions in a background thread.
+    ``workers`` is passed to ``Context.execute``: actions which declare
+    their dependencies are executed concurrently by that many threads.
+    Return a ``Future`` for the context right away."""
+    def run():
+        loaded = repoze.configuration.load(filename, package, context, loader,
+                                           cache, processes)
+        loaded.execute(workers)
+        return loaded
+    return _start(run)
@@ -0,0 +1,182 @@
+import cPickle
+import os
+import tempfile
+
+from hashlib import sha1
+
+_marker = object()
+
+class ParseCache(object):
+    """
+    An on-disk cache of the declarations parsed out of configuration
+    files.  Pass an instance as the ``cache`` argument of
+    ``repoze.configuration.load`` or ``repoze.configuration.execute``
+    (or as the ``_cache`` argument of a
+    ``repoze.configuration.context.Context``) to use it.
+
+    One cache entry is kept per configuration file.  An entry is keyed
+    on the absolute filename of the file and the package and override
+    state it was loaded with.  It records the value each name had when
+    the file first interpolated it.  It is valid as long as the
+    modification time and size of the file are unchanged and each of
+    those names would still be interpolated to the same value.  When
+    an entry is valid, the directives named in it are called again
+    with the structures recorded in it, without parsing the file.
+    Because ``!include`` directives are replayed too, each included
+    file consults its own entry: a change to any file in the include
+    graph causes only that file to be parsed again.
+    """
+    version = 3
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def key(self, filename, package, override):
+        key = (self.version, declarations_key(filename, package, override))
+        return sha1(repr(key)).hexdigest()
+
+    def signature(self, filename):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        return (st.st_mtime, st.st_size)
+
+    def lookup(self, context, filename, frame):
+        """ Return a ``CacheEntry`` for absolute ``filename``, which is
+        about to be loaded with the stack frame ``frame``.  Its
+        ``declarations`` attribute is ``None`` if the cache has no
+        valid entry for the file."""
+        key = self.key(filename, frame['package'], frame['override'])
+        signature = self.signature(filename)
+        entry = CacheEntry(self, key, signature)
+        if signature is not None:
+            data = self.get(key, signature)
+            if data is not None:
+                declarations = data['declarations']
+                if valid(context, frame, declarations, data['interpolated']):
+                    entry.declarations = declarations
+        return entry
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def get(self, key, signature):
+        """ Return the data stored under ``key`` if it was stored with
+        ``signature``, otherwise ``None`` """
+        try:
+            f = open(self.path(key), 'rb')
+        except (OSError, IOError):
+            return None
+        try:
+            try:
+                data = cPickle.load(f)
+            except Exception:
+                return None
+        finally:
+            f.close()
+        if data.get('signature') != signature:
+            return None
+        return data
+
+    def set(self, key, signature, declarations, interpolated):
+        if signature is None:
+            return
+        data = {'signature':signature, 'declarations':declarations,
+                'interpolated':interpolated}
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, tmp = tempfile.mkstemp(dir=self.directory)
+            f = os.fdopen(fd, 'wb')
+            try:
+                cPickle.dump(data, f, 2)
+            finally:
+                f.close()
+            os.rename(tmp, self.path(key))
+        except (OSError, IOError, cPickle.PicklingError):
+            # an unwritable cache must never break loading
+            pass
+
+class MemoryParseCache(ParseCache):
+    """ A ``ParseCache`` which keeps its entries in memory rather than
+    on disk.  Useful with ``Context.reload``."""
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key, signature):
+        data = self.entries.get(key)
+        if data is None or data[0] != signature:
+            return None
+        # a fresh copy each time: directives may mutate their structures
+        return cPickle.loads(data[1])
+
+    def set(self, key, signature, declarations, interpolated):
+        if signature is None:
+            return
+        data = {'declarations':declarations, 'interpolated':interpolated}
+        self.entries[key] = (signature, cPickle.dumps(data, 2))
+
+class CacheEntry(object):
+    declarations = None
+
+    def __init__(self, cache, key, signature):
+        self.cache = cache
+        self.key = key
+        self.signature = signature
+
+    def store(self, declarations, interpolated):
+        self.cache.set(self.key, self.signature, declarations, interpolated)
+
+    def load(self, context, stream, loader):
+        """ Called by ``Context.load`` with the stack frame for the
+        file pushed: replay the declarations of a valid entry, or
+        parse ``stream`` with ``loader`` and store its declarations."""
+        if self.declarations is not None:
+            context.replay(self.declarations, loader)
+        else:
+            declarations, interpolated = parse(context, stream, loader)
+            self.store(declarations, interpolated)
+
+def parse(context, stream, loader, call_directives=True):
+    """ Parse ``stream`` with ``loader``, recording the declarations it
+    contains.  Directives are called only if ``call_directives`` is
+    true.  Return a list of ``(tag, structure, span)`` declarations and
+    a mapping of the names interpolated while parsing to the value
+    each had when first interpolated."""
+    declarations = []
+    saved = context.interpolated
+    context.interpolated = {}
+    try:
+        if call_directives:
+            loader(context, stream, declarations=declarations)
+        else:
+            loader(context, stream, declarations=declarations,
+                   call_directives=False)
+        return declarations, context.interpolated
+    finally:
+        context.interpolated = saved
+
+def valid(context, frame, declarations, interpolated):
+    """ Return true if ``declarations`` can be replayed into
+    ``context`` with ``frame`` pushed: each name in ``interpolated``
+    still has the same value and each directive is still registered"""
+    for name, value in interpolated.items():
+        current = context.get(name, _marker)
+        if current is _marker:
+            current = frame.get(name, _marker)
+        if current != value:
+            return False
+    directives = context.get_directives()
+    for tag, structure, span in declarations:
+        if tag not in directives:
+            return False
+    return True
+
+def declarations_key(filename, package, override):
+    """ Return a hashable key which identifies the declarations parsed
+    out of absolute ``filename`` when it is loaded with ``package`` and
+    ``override``"""
+    if package is not None:
+        package = package.__name__
+    return (filename, package, override)
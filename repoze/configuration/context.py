@@ -1,53 +1,165 @@
 import os
-import pkg_resources
-import re
 
+from repoze.configuration.declaration import DetachedDeclaration
+from repoze.configuration.directives import include
+from repoze.configuration.directives import include_arguments
 from repoze.configuration.exceptions import ConfigurationConflict
-from repoze.configuration.loader import YAMLPluginLoader
+from repoze.configuration.exceptions import ConfigurationConflicts
+from repoze.configuration.exceptions import ConfigurationError
+from repoze.configuration.includes import IncludeGraph
+from repoze.configuration.interpolation import compile_template
+from repoze.configuration.registry import get_registry
+from repoze.configuration.resolver import Resolver
+from repoze.configuration.source import SourceBuffer
+from repoze.configuration.source import SourceCache
 
-_INTERP = re.compile(r"%\(([^)]*)\)s")
+# pkg_resources and PyYAML (imported by the loader module) are slow to
+# import; neither is imported until it is used
+pkg_resources = None
+
+def _resources():
+    global pkg_resources
+    if pkg_resources is None:
+        import pkg_resources
+    return pkg_resources
 
 class Context(dict):
 
     def __init__(self, *data, **kw):
         loader = kw.pop('_loader', None)
         if loader is None:
-            loader = YAMLPluginLoader
+            from repoze.configuration.loader import DefaultLoader
+            loader = DefaultLoader
+        cache = kw.pop('_cache', None)
+        resolver = kw.pop('_resolver', None)
+        if resolver is None:
+            resolver = Resolver()
+        instrument = kw.pop('_instrument', None)
+        include_once = kw.pop('_include_once', False)
+        collect_conflicts = kw.pop('_collect_conflicts', False)
         dict.__init__(self, *data, **kw)
         self.loader = loader
+        self.cache = cache
+        self.resolver = resolver
+        self.instrument = instrument
+        self.include_once = include_once
+        self.collect_conflicts = collect_conflicts
+        self.includes = IncludeGraph()
+        self.directives = None
+        self.interpolated = None
+        self.roots = []
+        self.sources = SourceCache()
         self.actions = []
         self.stack = []
         self.discriminators = {}
+        self.conflicts = []
+        self._conflict_groups = {}
+        self._scope = None
+        self._scope_frame = None
 
     @property
     def registry(self): # bw compat shim
         return self
 
     def interpolate(self, value):
-        def _interpolation_replace(match):
-            s = match.group(1)
-            if s in self:
-                return self[s]
-            if self.stack and s in self.stack[-1]:
-                return self.stack[-1][s]
-            raise KeyError(s)
-        if '%(' in value:
-            value = _INTERP.sub(_interpolation_replace, value)
-        return value.encode('utf-8')
-
-    def action(self, declaration, callback, discriminator=None, override=False):
+        template = compile_template(value)
+        if template.names is None:
+            return template.literal
+        scope = self.scope()
+        if self.interpolated is not None:
+            # keep the first value: a directive may redefine a name
+            # after the file has used it
+            for name in template.names:
+                if name in scope and name not in self.interpolated:
+                    self.interpolated[name] = scope[name]
+        return template.render(scope)
+
+    def scope(self):
+        """ Return a mapping of the names available for interpolation
+        to their values: the items of the context, falling back to the
+        items of the current stack frame.  The mapping is computed once
+        and reused until the context is changed or a different frame is
+        current; it must not be mutated."""
+        frame = None
+        if self.stack:
+            frame = self.stack[-1]
+        if self._scope is None or self._scope_frame is not frame:
+            scope = {}
+            if frame is not None:
+                scope.update(frame)
+            scope.update(self)
+            self._scope = scope
+            self._scope_frame = frame
+        return self._scope
+
+    # the interpolation scope is invalidated by every change to the
+    # context's own items
+
+    def __setitem__(self, key, value):
+        self._scope = None
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._scope = None
+        dict.__delitem__(self, key)
+
+    def clear(self):
+        self._scope = None
+        dict.clear(self)
+
+    def pop(self, *arg):
+        self._scope = None
+        return dict.pop(self, *arg)
+
+    def popitem(self):
+        self._scope = None
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        self._scope = None
+        return dict.setdefault(self, key, default)
+
+    def update(self, *arg, **kw):
+        self._scope = None
+        dict.update(self, *arg, **kw)
+
+    def action(self, declaration, callback, discriminator=None, override=False,
+               depends=None):
         stack_override = self.stack and self.stack[-1]['override']
         effective_override = override or stack_override
         if not effective_override and discriminator is not None:
             if discriminator in self.discriminators:
                 conflicting_action = self.discriminators[discriminator]
+                if self.collect_conflicts:
+                    self._add_conflict(discriminator, conflicting_action,
+                                       declaration)
+                    return
                 raise ConfigurationConflict(declaration,
                                             conflicting_action.declaration)
 
-        action = Action(discriminator, callback, declaration)
+        action = Action(discriminator, callback, declaration, depends)
         self.actions.append(action)
         if discriminator is not None:
             self.discriminators[discriminator] = action
+        if self.instrument is not None:
+            self.instrument.action_registered(action)
+
+    def _add_conflict(self, discriminator, conflicting_action, declaration):
+        # declarations which conflict with the same action form a group;
+        # an overriding action since then starts a new group
+        group = self._conflict_groups.get(discriminator)
+        if group is None or group[0] is not conflicting_action.declaration:
+            group = [conflicting_action.declaration]
+            self._conflict_groups[discriminator] = group
+            self.conflicts.append(group)
+        group.append(declaration)
+
+    def check_conflicts(self):
+        """ Raise a ``ConfigurationConflicts`` error describing every
+        group of conflicting declarations collected so far, if any (see
+        ``collect_conflicts``)."""
+        if self.conflicts:
+            raise ConfigurationConflicts(self.conflicts)
 
     def resolve(self, dottedname):
         if dottedname.startswith('.') or dottedname.startswith(':'):
@@ -59,8 +171,7 @@ class Context(dict):
                 dottedname = package.__name__
             else:
                 dottedname = package.__name__ + dottedname
-        return pkg_resources.EntryPoint.parse(
-            'x=%s' % dottedname).load(False)
+        return self.resolver.resolve(dottedname)
 
     def current_package(self):
         if not self.stack:
@@ -73,14 +184,36 @@ class Context(dict):
         return self.stack[-1]['override']
 
     def stream(self, filename, package=None):
-        if os.path.isabs(filename):
-            return open(filename)
-        if package is None:
+        """ Return a ``repoze.configuration.source.SourceBuffer`` over
+        the text of ``filename`` (relative to ``package``, or to the
+        current package, if it is not absolute).  The file is read at
+        once and closed, so no file handle stays open while it is
+        parsed."""
+        stream, named = self._read(filename, package)
+        if not named:
+            # e.g. a resource in a zipped egg: keep its text, which
+            # can't be read again by name, for error messages
+            self.sources.register(stream.name, stream.text)
+        return stream
+
+    def _read(self, filename, package):
+        # return a SourceBuffer over the text of the file, and whether
+        # it can be read again by the name it was given
+        if not os.path.isabs(filename) and package is None:
             package = self.current_package()
-        if package is None:
-            return open(filename)
+        if os.path.isabs(filename) or package is None:
+            f = open(filename)
         else:
-            return pkg_resources.resource_stream(package.__name__, filename)
+            f = _resources().resource_stream(package.__name__, filename)
+        try:
+            name = getattr(f, 'name', None)
+            named = name is not None
+            if not named:
+                name = '%s:%s' % (package.__name__, filename)
+            text = f.read()
+        finally:
+            f.close()
+        return SourceBuffer(name, text), named
 
     def abs_filename(self, filename, package=None):
         if os.path.isabs(filename):
@@ -90,30 +223,205 @@ class Context(dict):
         if package is None:
             return os.path.abspath(filename)
         else:
-            return pkg_resources.resource_filename(package.__name__, filename)
+            return _resources().resource_filename(package.__name__, filename)
         
+    def get_directives(self, loader=None):
+        """ Return a mapping of YAML tag to directive callable: the
+        directives of the ``registry`` of ``loader`` (by default, the
+        context's loader) or, if it has none, of the process-wide
+        registry.  If ``directives`` is set, it is returned instead."""
+        if self.directives is not None:
+            return self.directives
+        if loader is None:
+            loader = self.loader
+        registry = getattr(loader, 'registry', None)
+        if registry is None:
+            registry = get_registry()
+        return registry.tags()
+
     def load(self, filename, package, override=False, loader=None):
+        """ Load the configuration file ``filename`` (relative to
+        ``package``, if it is not ``None``), calling the directives in
+        it.  If the context's ``include_once`` is true, a file included
+        by another which has already been loaded with the same
+        ``override`` is skipped.
+
+        If the context's ``collect_conflicts`` is true, a declaration
+        whose discriminator conflicts with an earlier one does not stop
+        loading: it is added to a group in ``conflicts`` (the earlier
+        declaration first) and its action is dropped.  Once the
+        outermost file has been loaded, ``ConfigurationConflicts`` is
+        raised if any conflicts were found."""
         fn = self.abs_filename(filename, package)
+        path = os.path.realpath(fn)
+        includes = self.includes
+        if self.include_once and includes.is_duplicate(path, override):
+            includes.record(path)
+            return
         here = os.path.dirname(fn)
-        stream = self.stream(filename, package)
+        frame = {'filename':filename, 'package':package,
+                 'override':override, 'here':here}
+        entry = None
+        stream = None
+        if self.cache is not None:
+            entry = self.cache.lookup(self, fn, frame)
+        if entry is None or entry.declarations is None:
+            stream = self.stream(filename, package)
+        if not self.stack:
+            self.roots.append((filename, package, override, loader))
+        try:
+            includes.enter(path, override)
+        except:
+            if stream is not None:
+                stream.close()
+            raise
+        self.stack.append(frame)
+        if loader is None:
+            loader = self.loader
+        instrument = self.instrument
+        if instrument is not None:
+            instrument.enter_file(fn)
+        try:
+            if entry is None:
+                loader(self, stream)
+            else:
+                entry.load(self, stream, loader)
+        finally:
+            self.stack.pop()
+            includes.exit()
+            if instrument is not None:
+                instrument.exit_file()
+        if not self.stack:
+            self.check_conflicts()
+
+    def iterload(self, filename, package, override=False, loader=None):
+        """ Parse a configuration file without calling any directives,
+        yielding a ``(tag, structure, span, depth)`` tuple for each
+        directive found in it as it is parsed.  ``depth`` is the
+        include depth of the file the directive was found in (``0`` for
+        ``filename`` itself).  Files named by ``!include`` directives
+        are parsed in turn, after their ``!include`` is yielded.
+
+        ``loader`` (by default, the context's loader) must be a
+        ``repoze.configuration.loader.PluginLoaderMixin`` subclass.
+        Only one YAML document is held in memory per file being parsed,
+        and no text is kept in ``sources``.  The files parsed are
+        recorded in ``includes`` as they are by ``load``.
+        """
+        fn = self.abs_filename(filename, package)
+        path = os.path.realpath(fn)
+        includes = self.includes
+        if self.include_once and includes.is_duplicate(path, override):
+            includes.record(path)
+            return
+        includes.enter(path, override)
+        try:
+            stream, named = self._read(filename, package)
+        except:
+            includes.exit()
+            raise
         self.stack.append({'filename':filename, 'package':package,
-                           'override':override, 'here':here})
+                           'override':override, 'here':os.path.dirname(fn)})
+        depth = len(self.stack) - 1
         if loader is None:
             loader = self.loader
+        directives = self.get_directives(loader)
         try:
-            loader(self, stream)
+            parser = loader(self, stream, declarations=[],
+                            call_directives=False, lazy=True)
+            for tag, structure, span in parser.iter_declarations():
+                if directives.get(tag) is include:
+                    declaration = DetachedDeclaration(self, structure, span)
+                    arguments = include_arguments(declaration) + (loader,)
+                    yield tag, structure, span, depth
+                    for item in self.iterload(*arguments):
+                        yield item
+                else:
+                    yield tag, structure, span, depth
         finally:
             self.stack.pop()
+            includes.exit()
+            stream.close()
 
-    def execute(self):
-        for action in self.actions:
-            action.execute()
+    def reload(self):
+        """ Load the configuration files loaded so far again, and return
+        a ``repoze.configuration.delta.ActionDelta`` describing the
+        differences between the old and the new actions.  The new
+        actions are not executed.
+
+        The context must have been created with a cache (see
+        ``repoze.configuration.cache``), which records the declarations
+        in each file as it is loaded: only the files which changed are
+        parsed again.  If loading fails, the context is left
+        unchanged."""
+        from repoze.configuration.delta import ActionDelta
+        if self.cache is None:
+            raise ConfigurationError(
+                'Only a context loaded with a cache can be reloaded')
+        roots = self.roots
+        actions = self.actions
+        discriminators = self.discriminators
+        includes = self.includes
+        sources = self.sources
+        self.roots = []
+        self.sources = SourceCache()
+        self.actions = []
+        self.discriminators = {}
+        self.includes = IncludeGraph()
+        self.conflicts = []
+        self._conflict_groups = {}
+        try:
+            for filename, package, override, loader in roots:
+                self.load(filename, package, override, loader)
+        except:
+            self.roots = roots
+            self.actions = actions
+            self.discriminators = discriminators
+            self.includes = includes
+            self.sources = sources
+            self.conflicts = []
+            self._conflict_groups = {}
+            raise
+        return ActionDelta(actions, self.actions)
+
+    def replay(self, declarations, loader=None):
+        """ Call the directive named by each ``(tag, structure, span)``
+        tuple in ``declarations`` with a detached declaration.  The
+        directives are looked up as by ``get_directives``."""
+        directives = self.get_directives(loader)
+        instrument = self.instrument
+        for tag, structure, span in declarations:
+            directive = directives[tag]
+            declaration = DetachedDeclaration(self, structure, span)
+            if instrument is None:
+                directive(declaration)
+            else:
+                instrument.call_directive(tag, directive, declaration)
+
+    def execute(self, workers=None):
+        """ Execute the actions.  If ``workers`` is greater than one,
+        actions which declare their dependencies are executed
+        concurrently by that many threads; see
+        ``repoze.configuration.scheduler.action_graph``.  Nothing is
+        executed if conflicts have been collected (see ``load``)."""
+        self.check_conflicts()
+        if workers is not None and workers > 1:
+            from repoze.configuration.scheduler import execute_parallel
+            execute_parallel(self.actions, workers)
+        else:
+            for action in self.actions:
+                action.execute()
 
 class Action(object):
-    def __init__(self, discriminator, callback, declaration):
+    # no per-instance __dict__: large configurations register hundreds
+    # of thousands of actions
+    __slots__ = ('discriminator', 'callback', 'declaration', 'depends')
+
+    def __init__(self, discriminator, callback, declaration, depends=None):
         self.discriminator = discriminator
         self.callback = callback
         self.declaration = declaration
+        self.depends = depends
         
     def execute(self):
         if self.callback is not None:
@@ -1,5 +1,6 @@
 import inspect
 from repoze.configuration.exceptions import ConfigurationError
+from repoze.configuration.source import SourceSpan
 
 _marker = object()
 
@@ -136,16 +137,26 @@ class Declaration(object):
             return func(*arg, **kw)
         return callback
 
-    def action(self, callback, discriminator=None, override=False):
+    def action(self, callback, discriminator=None, override=False,
+               depends=None):
         """ Insert a deferred processing action.  ``callback`` is a
         callback that accepts no arguments.  ``discriminator`` is any
         hashable value which makes the action unique amongst all other
         actions during processing.  ``override``, if True, means that
         this action should override previous actions during
-        processing."""
+        processing.  ``depends``, if not None, is a sequence of the
+        discriminators of the actions this action must be executed
+        after; an action which declares its dependencies may be
+        executed concurrently with other such actions (see
+        ``Context.execute``)."""
+        if depends is None:
+            return self.context.action(self, callback,
+                                       discriminator=discriminator,
+                                       override=override)
         return self.context.action(self, callback,
                                    discriminator=discriminator,
-                                   override=override)
+                                   override=override,
+                                   depends=depends)
 
 class YAMLDeclaration(Declaration):
     """
@@ -169,13 +180,38 @@ class YAMLDeclaration(Declaration):
         self._loader = loader
         self._node = node
         self._structure = _marker
+        self._span = None
 
     @property
     def lineinfo(self):
-        return lineinfo(self._node)
+        return self.span.lineinfo(_sources(self.context))
+
+    @property
+    def span(self):
+        if self._node is None:
+            return self._span
+        return node_span(self._node)
+
+    def detach(self):
+        """ Release the loader and YAML node the declaration was created
+        from, keeping the structure only if it has already been
+        constructed.  The loader calls this after the directive
+        returns, so declarations kept by directives (e.g. in callbacks)
+        don't keep the loader, its buffers and the node graph alive.
+        A structure the directive never read is not constructed (nor
+        interpolated); reading it after the declaration is detached
+        raises a ``ConfigurationError``."""
+        if self._node is not None:
+            self._span = node_span(self._node)
+            self._loader = None
+            self._node = None
 
     def get_structure(self):
         if self._structure is _marker:
+            if self._node is None:
+                raise ConfigurationError(
+                    'The structure of the declaration at %s was not read '
+                    'before its directive returned' % self.lineinfo)
             loader = self._loader
             structure_ctor = getattr(loader, 'construct_%s' % self._node.id)
             # scalar structures don't support the 'deep' argument, required
@@ -192,35 +228,53 @@ class YAMLDeclaration(Declaration):
 
     structure = property(get_structure, set_structure)
 
+class DetachedDeclaration(Declaration):
+    """
+    A declaration which is not attached to a YAML node graph.  Its
+    ``structure`` is an already-constructed Python data structure and
+    its ``span`` is a ``(filename, start_index, end_index, start_line,
+    end_line)`` tuple describing where the declaration came from.
+    Detached declarations are used when directives are replayed from
+    a parse cache.
+    """
+    def __init__(self, context, structure, span):
+        self.context = context
+        self.structure = structure
+        if not isinstance(span, SourceSpan):
+            span = SourceSpan(*span)
+        self.span = span
+
+    @property
+    def lineinfo(self):
+        return self.span.lineinfo(_sources(self.context))
+
 class PythonDeclaration(Declaration):
     lineinfo = ''
 
     def __init__(self, context, **kw):
         self.context = context
-        self.structure = dict(kw)
+        self.structure = kw # already a new dict
 
 class ImperativeDeclaration(PythonDeclaration):
-    def action(self, callback, discriminator=None, override=False):
+    def action(self, callback, discriminator=None, override=False,
+               depends=None):
         """
         Execute immediately, don't discriminate.
         """
         callback()
 
-def lineinfo(node):
+def lineinfo(node, sources=None):
+    """ Return a string describing the location of a YAML node.
+    ``sources`` is a ``repoze.configuration.source.SourceCache``."""
+    return node_span(node).lineinfo(sources)
+
+def node_span(node):
+    """ Return the ``SourceSpan`` of a YAML node """
     start_mark = node.start_mark
     end_mark = node.end_mark
-    filename = start_mark.name
-    try:
-        f = open(filename, 'r')
-        f.seek(start_mark.index)
-        data = f.read(end_mark.index - start_mark.index) + ' in '
-    except (OSError, IOError):
-        data = ''
-    msg = ('%slines %s-%s of file "%s"' % (
-        data,
-        start_mark.line+1,
-        end_mark.line+1,
-        start_mark.name,
-        )
-    )
-    return msg
+    return SourceSpan(start_mark.name, start_mark.index, end_mark.index,
+                      start_mark.line, end_mark.line)
+
+def _sources(context):
+    # the context's source cache, if it has one
+    return getattr(context, 'sources', None)
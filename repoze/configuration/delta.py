@@ -0,0 +1,66 @@
+class ActionDelta(object):
+    """
+    The differences between two lists of actions, as returned by
+    ``repoze.configuration.context.Context.reload``.
+
+    Actions are matched up by discriminator.  Actions without a
+    discriminator are matched up by the file which declared them, in
+    order.  A matched pair of actions whose declarations have a
+    different structure or come from a different file is considered
+    changed; callbacks are never compared.
+
+    - added: the new actions which match no old action
+
+    - removed: the old actions which match no new action
+
+    - changed: a list of ``(old, new)`` action pairs
+    """
+    def __init__(self, old, new):
+        old_keyed = _keyed(old)
+        new_keyed = _keyed(new)
+        self.added = [ action for key, action in _ordered(new_keyed, new)
+                       if key not in old_keyed ]
+        self.removed = [ action for key, action in _ordered(old_keyed, old)
+                         if key not in new_keyed ]
+        self.changed = []
+        for key, action in _ordered(new_keyed, new):
+            previous = old_keyed.get(key)
+            if previous is not None and _differs(previous, action):
+                self.changed.append((previous, action))
+
+    def __nonzero__(self):
+        return bool(self.added or self.removed or self.changed)
+
+def _keyed(actions):
+    keyed = {}
+    counts = {}
+    for action in actions:
+        if action.discriminator is not None:
+            base = ('d', action.discriminator)
+        else:
+            base = ('f', _filename(action.declaration))
+        n = counts.get(base, 0)
+        counts[base] = n + 1
+        keyed[base + (n,)] = action
+    return keyed
+
+def _ordered(keyed, actions):
+    # the items of ``keyed``, in the order of ``actions``
+    positions = dict([ (id(action), i) for i, action in enumerate(actions) ])
+    items = keyed.items()
+    items.sort(key=lambda item: positions[id(item[1])])
+    return items
+
+def _filename(declaration):
+    span = getattr(declaration, 'span', None)
+    if span is None:
+        return None
+    return span[0]
+
+def _differs(old, new):
+    old_declaration = old.declaration
+    new_declaration = new.declaration
+    if _filename(old_declaration) != _filename(new_declaration):
+        return True
+    return (getattr(old_declaration, 'structure', None) !=
+            getattr(new_declaration, 'structure', None))
@@ -1,5 +1,11 @@
 def include(declaration):
     """ Include another YAML file """
+    filename, package, override = include_arguments(declaration)
+    declaration.context.load(filename, package, override)
+
+def include_arguments(declaration):
+    """ Return the ``(filename, package, override)`` arguments an
+    ``include`` declaration passes to ``Context.load`` """
     expect_names = ['package', 'filename', 'override']
     declaration.expect(dict, names=expect_names)
     package = declaration.string('package')
@@ -10,4 +16,4 @@ def include(declaration):
     filename = declaration.string('filename', 'configure.yml')
     override = declaration.string('override',
                                   declaration.context.current_override())
-    declaration.context.load(filename, package, override)
+    return filename, package, override
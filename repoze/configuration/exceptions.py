@@ -10,7 +10,11 @@ class ConfigurationConflict(ConfigurationError):
     def __init__(self, declaration1, declaration2):
         self.declaration1 = declaration1
         self.declaration2 = declaration2
-        self.msg = str(self)
+
+    @property
+    def msg(self):
+        # formatted lazily: formatting reads the configuration sources
+        return str(self)
 
     def __str__(self):
         message = []
@@ -20,3 +24,52 @@ class ConfigurationConflict(ConfigurationError):
         message.append(self.declaration1.lineinfo)
         return '\n\n'.join(message)
 
+class ConfigurationConflicts(ConfigurationConflict):
+    """ The exception type raised when a context which collects
+    conflicts (see ``repoze.configuration.context.Context.load``) has
+    found some.  ``conflicts`` is a list of groups of conflicting
+    declarations; the first declaration of each group is the one the
+    others conflict with.  ``declaration1`` and ``declaration2`` are
+    the first two declarations of the first group."""
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        self.declaration1 = conflicts[0][1]
+        self.declaration2 = conflicts[0][0]
+
+    def __str__(self):
+        message = ['Conflicting declarations (%d groups):' %
+                   len(self.conflicts)]
+        for group in self.conflicts:
+            message.append('\n\nconflicts with\n\n'.join(
+                [ declaration.lineinfo for declaration in group ]))
+        return '\n\n----\n\n'.join(message)
+
+class ConfigurationIncludeCycle(ConfigurationError):
+    """ The exception type raised when a configuration file includes
+    itself, directly or indirectly.  ``chain`` is the list of the
+    absolute paths of the files in the cycle, starting and ending with
+    the same file, outermost first."""
+    def __init__(self, chain):
+        self.chain = chain
+
+    @property
+    def msg(self):
+        return str(self)
+
+    def __str__(self):
+        return 'Circular include:\n\n%s' % '\n  includes '.join(self.chain)
+
+class ConfigurationExecutionError(ConfigurationError):
+    """ The exception type raised when the callback of an action fails
+    while actions are being executed in parallel """
+    def __init__(self, declaration, exception):
+        self.declaration = declaration
+        self.exception = exception
+
+    @property
+    def msg(self):
+        return str(self)
+
+    def __str__(self):
+        return '%s: %s\n%s' % (self.exception.__class__.__name__,
+                               self.exception, self.declaration.lineinfo)
@@ -1,15 +1,14 @@
-import logging
-from pkg_resources import iter_entry_points
-
 from repoze.configuration.context import Context
 from repoze.configuration.declaration import ImperativeDeclaration
-
-_ambiguous = object()
+from repoze.configuration.registry import DirectiveRegistry
+from repoze.configuration.registry import _ambiguous
+from repoze.configuration.registry import get_registry
 
 class ImperativeConfig(object):
     """
     Can be used standalone or as a mixin, providing access to any discoverable
-    configuration directives as API methods.
+    configuration directives as API methods.  Use ``apply`` to call many
+    directives at once.
     """
     EP_GROUP = 'repoze.configuration.directive'
     CONFIG_ATTR = 'config'
@@ -17,44 +16,53 @@ class ImperativeConfig(object):
     Context = Context
 
     def __init__(self, context=None,
-                 iter_entry_points=iter_entry_points # override for testing
+                 iter_entry_points=None # override for testing
                  ):
         if context is None:
             context = self.Context(**{self.CONFIG_ATTR: self})
         self.context = context
-        self.directives = directives = {}
+        if iter_entry_points is None:
+            registry = get_registry()
+        else:
+            registry = DirectiveRegistry(iter_entry_points, self.EP_GROUP)
+        self.directives = dict(registry.names())
 
-        for point in list(iter_entry_points(self.EP_GROUP)):
-            try:
-                directive = point.load()
-                name = point.name
-                if name in directives:
-                    logging.warn(
-                        "Directive name declared more than once: %s.  " % name
-                    )
-                    directives[name] = _ambiguous # force explicitness
-                else:
-                    directives[name] = directive
+    def __getattr__(self, name):
+        # called only for names not found on the instance: the callable
+        # returned is kept in the instance dictionary, so later lookups
+        # of the same directive don't come back here
+        directive = self._lookup(name)
 
-            except ImportError:
-                logging.info(
-                    'Could not import repoze.configuration.directive '
-                    'entry point "%s"' % point)
+        def wrapper(**kw):
+            declaration = self.Declaration(self.context, **kw)
+            directive(declaration)
 
-    def __getattr__(self, name):
+        self.__dict__[name] = wrapper
+        return wrapper
+
+    def apply(self, records):
+        """ Call the directive named by each ``(name, kw)`` record in
+        ``records``, in order, as ``getattr(self, name)(**kw)`` would.
+        Each distinct name is looked up once; an ``AttributeError`` is
+        raised for an unknown or ambiguous name."""
+        Declaration = self.Declaration
+        context = self.context
+        directives = {}
+        for name, kw in records:
+            directive = directives.get(name)
+            if directive is None:
+                directive = directives[name] = self._lookup(name)
+            directive(Declaration(context, **kw))
+
+    def _lookup(self, name):
+        # raise for an unknown name now, for an ambiguous one when its
+        # directive is called
         directive = self.directives.get(name, None)
         if directive is None:
             raise AttributeError(name)
-
         if directive is _ambiguous:
-            def ambiguous(**kw):
+            def ambiguous(declaration):
                 raise AttributeError(
-                    "More than one directive uses name: %s" % name
-                )
+                    "More than one directive uses name: %s" % name)
             return ambiguous
-
-        def wrapper(**kw):
-            declaration = self.Declaration(self.context, **kw)
-            directive(declaration)
-
-        return wrapper
+        return directive
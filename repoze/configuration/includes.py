@@ -0,0 +1,66 @@
+from repoze.configuration.exceptions import ConfigurationIncludeCycle
+
+class IncludeGraph(object):
+    """
+    The graph of the configuration files loaded into a context
+    (``Context.includes``), keyed by canonical absolute path.
+
+    - edges: a mapping of each file to the list of the files it
+      includes, in the order they were first included
+
+    - counts: a mapping of each file to the number of times it was
+      loaded or included (including includes skipped because the file
+      had already been loaded)
+
+    - chain: the files currently being loaded, outermost first
+    """
+    def __init__(self):
+        self.edges = {}
+        self.counts = {}
+        self.chain = []
+        self.loaded = set()
+
+    def enter(self, path, override):
+        """ Record that ``path`` is being loaded (by the file at the end
+        of the chain, if any) with ``override``.  Raise a
+        ``ConfigurationIncludeCycle`` if it is already being loaded."""
+        if path in self.chain:
+            raise ConfigurationIncludeCycle(self.chain + [path])
+        self.record(path)
+        self.chain.append(path)
+        self.loaded.add((path, override))
+
+    def exit(self):
+        """ Record that the file at the end of the chain is loaded """
+        self.chain.pop()
+
+    def record(self, path):
+        """ Record an include of ``path`` by the file at the end of the
+        chain, without loading it """
+        self.counts[path] = self.counts.get(path, 0) + 1
+        self.edges.setdefault(path, [])
+        if self.chain:
+            includes = self.edges[self.chain[-1]]
+            if path not in includes:
+                includes.append(path)
+
+    def is_duplicate(self, path, override):
+        """ Return true if ``path`` is about to be included, not loaded
+        at the top level, and has already been loaded with ``override``
+        (but is not being loaded now, which would be a cycle) """
+        return bool(self.chain and path not in self.chain and
+                    (path, override) in self.loaded)
+
+    def includers(self, path):
+        """ Return the sorted list of the files which include ``path`` """
+        return sorted([ parent for parent, includes in self.edges.items()
+                        if path in includes ])
+
+    def fan_in(self):
+        """ Return a mapping of each file to the number of distinct
+        files which include it """
+        result = dict([ (path, 0) for path in self.edges ])
+        for includes in self.edges.values():
+            for path in includes:
+                result[path] += 1
+        return result
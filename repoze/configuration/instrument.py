@@ -0,0 +1,115 @@
+import time
+
+class LoadInstrument(object):
+    """
+    Records where the time goes while configuration is loaded into a
+    context.  Pass an instance as the ``_instrument`` argument of a
+    ``repoze.configuration.context.Context`` (or assign it to the
+    context's ``instrument`` attribute) before loading; call ``report``
+    afterwards.
+
+    For each file loaded it records the time spent loading it, the
+    number of directives it contains and the number of actions they
+    registered.  For each directive tag it records the number of calls
+    and the time spent in them.
+    """
+    timer = time.time
+
+    def __init__(self):
+        self.files = []
+        self.stack = []
+        self.directives = {}
+        self.actions = 0
+
+    def enter_file(self, filename):
+        """ Called by ``Context.load`` before loading ``filename`` """
+        record = FileRecord(filename, len(self.stack))
+        if self.stack:
+            self.stack[-1].includes.append(record)
+        else:
+            self.files.append(record)
+        self.stack.append(record)
+        record.started = self.timer()
+
+    def exit_file(self):
+        """ Called by ``Context.load`` after loading a file, even if
+        loading it failed """
+        record = self.stack.pop()
+        record.time = self.timer() - record.started
+
+    def call_directive(self, tag, directive, declaration):
+        """ Call ``directive`` with ``declaration``, timing the call """
+        if self.stack:
+            self.stack[-1].directives += 1
+        start = self.timer()
+        try:
+            directive(declaration)
+        finally:
+            elapsed = self.timer() - start
+            stats = self.directives.setdefault(tag, [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def action_registered(self, action):
+        """ Called by ``Context.action`` for each action registered """
+        self.actions += 1
+        if self.stack:
+            self.stack[-1].actions += 1
+
+    def report(self):
+        """ Return the data recorded as a structure of dictionaries,
+        lists, strings and numbers (suitable for e.g. ``json.dumps``):
+
+        - files: the tree of files loaded (see ``FileRecord.report``)
+
+        - directives: a mapping of directive tag to a dictionary with
+          the ``count`` of calls and the total ``time`` spent in them
+          (including, for ``!include``, the time spent loading the
+          file included)
+
+        - actions: the number of actions registered
+        """
+        directives = {}
+        for tag, (count, elapsed) in self.directives.items():
+            directives[tag] = {'count':count, 'time':elapsed}
+        return {'files':[ record.report() for record in self.files ],
+                'directives':directives,
+                'actions':self.actions}
+
+class FileRecord(object):
+    """ The measurements of one file loaded """
+    started = None
+    time = 0.0
+
+    def __init__(self, filename, depth):
+        self.filename = filename
+        self.depth = depth
+        self.directives = 0
+        self.actions = 0
+        self.includes = []
+
+    def report(self):
+        """ Return a dictionary with the ``filename``, include
+        ``depth``, the number of ``directives`` in the file and of
+        ``actions`` they registered, the files it ``includes`` (a list
+        of such dictionaries), and the ``time`` spent loading it.  The
+        ``cumulative_directives`` and ``cumulative_actions`` include
+        those of the files included; ``time`` includes the time spent
+        loading them and ``self_time`` doesn't."""
+        includes = [ record.report() for record in self.includes ]
+        directives = self.directives
+        actions = self.actions
+        self_time = self.time
+        for include in includes:
+            directives += include['cumulative_directives']
+            actions += include['cumulative_actions']
+            self_time -= include['time']
+        return {'filename':self.filename,
+                'depth':self.depth,
+                'time':self.time,
+                'self_time':self_time,
+                'directives':self.directives,
+                'actions':self.actions,
+                'cumulative_directives':directives,
+                'cumulative_actions':actions,
+                'includes':includes}
@@ -0,0 +1,66 @@
+import re
+
+from operator import itemgetter
+
+_INTERP = re.compile(r"%\(([^)]*)\)s")
+
+# compiled templates, keyed on the string they were compiled from; the
+# cache is simply emptied when it grows past MAX_TEMPLATES entries
+MAX_TEMPLATES = 10000
+_templates = {}
+
+class Template(object):
+    """
+    A string compiled for interpolation.  A string which contains no
+    ``%(name)s`` markers compiles to a template whose ``names`` is
+    ``None`` and whose ``literal`` is the UTF-8 encoded string.
+    Otherwise ``format`` is the string with each marker replaced by
+    ``%s`` (and other percent signs doubled) and ``names`` is the tuple
+    of the names of the markers, in order.
+    """
+    __slots__ = ('literal', 'format', 'names', 'values')
+
+    def __init__(self, literal=None, format=None, names=None):
+        self.literal = literal
+        self.format = format
+        self.names = names
+        if names is not None:
+            # returns the tuple of the values of ``names`` in a scope
+            self.values = itemgetter(*names)
+            if len(names) == 1:
+                getter = self.values
+                self.values = lambda scope: (getter(scope),)
+
+    def render(self, scope):
+        """ Return the UTF-8 encoded string with each marker replaced
+        by its value in ``scope``.  Raise a ``KeyError`` naming the
+        first name missing from ``scope``."""
+        if self.names is None:
+            return self.literal
+        return (self.format % self.values(scope)).encode('utf-8')
+
+def compile_template(value):
+    """ Return the (possibly cached) ``Template`` for ``value`` """
+    template = _templates.get(value)
+    if template is None:
+        template = _compile(value)
+        if len(_templates) >= MAX_TEMPLATES:
+            _templates.clear()
+        _templates[value] = template
+    return template
+
+def _compile(value):
+    if '%(' not in value:
+        return Template(literal=value.encode('utf-8'))
+    parts = []
+    names = []
+    pos = 0
+    for match in _INTERP.finditer(value):
+        parts.append(value[pos:match.start()].replace('%', '%%'))
+        parts.append('%s')
+        names.append(match.group(1))
+        pos = match.end()
+    if not names:
+        return Template(literal=value.encode('utf-8'))
+    parts.append(value[pos:].replace('%', '%%'))
+    return Template(format=value[:0].join(parts), names=tuple(names))
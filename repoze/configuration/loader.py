@@ -1,50 +1,135 @@
+import copy
+
 from yaml import SafeLoader
-from pkg_resources import iter_entry_points
+
+try:
+    from yaml import CSafeLoader
+except ImportError: # pragma: no cover (PyYAML built without libyaml)
+    CSafeLoader = None
 
 from repoze.configuration.exceptions import ConfigurationError
 from repoze.configuration.declaration import YAMLDeclaration
 from repoze.configuration.declaration import lineinfo
-
-import logging
+from repoze.configuration.declaration import node_span
+from repoze.configuration.registry import DirectiveRegistry
+from repoze.configuration.registry import EP_GROUP
+from repoze.configuration.registry import get_registry
 
 _marker = object()
 
-class YAMLPluginLoader(SafeLoader):
-    EP_GROUP = 'repoze.configuration.directive'
-    def __init__(self, context, stream, iter_entry_points=iter_entry_points):
+class PluginLoaderMixin(object):
+    """ The parts of a directive-calling loader which don't depend on
+    the YAML parser implementation.  A concrete loader class mixes
+    this into a PyYAML loader class and defines ``init_parser``.
+
+    The directives called are those of ``registry`` (by default, the
+    process-wide registry).  A subclass may set it to another
+    ``repoze.configuration.registry.DirectiveRegistry``; the context
+    looks up the directives of the declarations it replays from a
+    cache in the registry of its loader (see
+    ``Context.get_directives``)."""
+    EP_GROUP = EP_GROUP
+    registry = None
+    def __init__(self, context, stream, iter_entry_points=None,
+                 declarations=None, call_directives=True, lazy=False):
         self.context = context
-        for point in list(iter_entry_points(self.EP_GROUP)):
-            try:
-                directive = point.load()
-                if point.name.startswith('tag:'):
-                    directive_name = point.name
-                else:
-                    directive_name = '!' + point.name
-                self.add_constructor(directive_name, wrap_directive(directive))
-            except ImportError:
-                logging.info(
-                    'Could not import repoze.configuration.directive '
-                    'entry point "%s"' % point)
-        self.add_constructor('tag:yaml.org,2002:str', self.interpolate_str)
-        SafeLoader.__init__(self, stream)
+        # if ``declarations`` is a list, a (tag, structure, span) tuple
+        # is appended to it for each directive called (see ``cache``)
+        self.declarations = declarations
+        if iter_entry_points is not None:
+            registry = DirectiveRegistry(iter_entry_points, self.EP_GROUP)
+        elif self.registry is not None:
+            registry = self.registry
+        else:
+            registry = get_registry()
+        self.registry = registry
+        # an instance attribute: the class-level table is never mutated
+        cls = self.__class__
+        def factory(registry):
+            return cls.constructor_table(registry, call_directives)
+        self.yaml_constructors = registry.derived(
+            (cls, 'yaml_constructors', call_directives), factory)
+        self.init_parser(stream)
+        if not lazy:
+            while self.check_data():
+                self.get_data()
+
+    def iter_declarations(self):
+        """ Parse the stream one YAML document at a time, yielding the
+        ``(tag, structure, span)`` tuples appended to ``declarations``
+        while parsing each document.  Only useful if the loader was
+        created with ``lazy=True``."""
+        declarations = self.declarations
         while self.check_data():
             self.get_data()
+            for declaration in declarations:
+                yield declaration
+            del declarations[:]
+
+    @classmethod
+    def constructor_table(cls, registry, call_directives=True):
+        """ Return the YAML constructor table for ``registry``.  If
+        ``call_directives`` is false, the constructor for a directive
+        tag only records the declaration in ``declarations`` without
+        calling the directive."""
+        table = cls.yaml_constructors.copy()
+        for tag, directive in registry.tags().items():
+            if call_directives:
+                table[tag] = wrap_directive(directive)
+            else:
+                table[tag] = record_declaration
+        table['tag:yaml.org,2002:str'] = _interpolate_str
+        return table
 
     def interpolate_str(self, loader, node):
         value = loader.construct_scalar(node)
         try:
             value = self.context.interpolate(value)
         except KeyError, why:
-            li = lineinfo(node)
+            li = lineinfo(node, getattr(self.context, 'sources', None))
             msg = 'Cannot interpolate %%(%s)s found in %s' % (why[0], li)
             raise ConfigurationError(msg)
         return value
 
+class YAMLPluginLoader(PluginLoaderMixin, SafeLoader):
+    """ A directive-calling loader built on the pure-Python PyYAML
+    parser """
+    def init_parser(self, stream):
+        SafeLoader.__init__(self, stream)
+
+if CSafeLoader is not None:
+    class CYAMLPluginLoader(PluginLoaderMixin, CSafeLoader):
+        """ A directive-calling loader built on the LibYAML-based
+        PyYAML parser """
+        def init_parser(self, stream):
+            CSafeLoader.__init__(self, stream)
+    DefaultLoader = CYAMLPluginLoader
+else: # pragma: no cover
+    CYAMLPluginLoader = None
+    DefaultLoader = YAMLPluginLoader
+
+def _interpolate_str(loader, node):
+    return loader.interpolate_str(loader, node)
+
 def wrap_directive(directive):
     def wrapper(loader, node):
         context = loader.context
         declaration = YAMLDeclaration(context, loader, node)
-        directive(declaration)
+        declarations = getattr(loader, 'declarations', None)
+        if declarations is not None:
+            # copy: the directive may mutate (e.g. ``pop``) its structure
+            structure = copy.deepcopy(declaration.structure)
+            declarations.append((node.tag, structure, node_span(node)))
+        instrument = getattr(context, 'instrument', None)
+        if instrument is None:
+            directive(declaration)
+        else:
+            instrument.call_directive(node.tag, directive, declaration)
+        declaration.detach()
     wrapper.wrapped = directive
     return wrapper
 
+def record_declaration(loader, node):
+    declaration = YAMLDeclaration(loader.context, loader, node)
+    loader.declarations.append(
+        (node.tag, declaration.structure, node_span(node)))
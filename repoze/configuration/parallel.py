@@ -0,0 +1,301 @@
+import copy
+import cPickle
+import multiprocessing
+import os
+import sys
+
+from repoze.configuration.cache import declarations_key
+from repoze.configuration.cache import parse as parse_declarations
+from repoze.configuration.cache import valid
+from repoze.configuration.declaration import DetachedDeclaration
+from repoze.configuration.directives import include
+from repoze.configuration.directives import include_arguments
+from repoze.configuration.exceptions import ConfigurationError
+from repoze.configuration.interpolation import compile_template
+
+class ParallelParser(object):
+    """
+    Parses included configuration files in a pool of worker processes.
+    Pass an instance as the ``_cache`` argument of a
+    ``repoze.configuration.context.Context`` (or pass ``processes`` to
+    ``repoze.configuration.load`` or ``repoze.configuration.execute``)
+    to use it.
+
+    When a file is loaded, the files named by its ``!include``
+    declarations are handed to the worker pool, which parses them
+    into lists of declarations without calling any directives.  The
+    file itself is then parsed in this process, calling its directives
+    as it goes, exactly as serial loading does.  By the time one of
+    its ``!include`` directives is called, the file it includes has
+    usually been parsed by a worker already: its declarations are
+    replayed in order (handing the files it includes to the pool
+    first).  All directives are called in this process, in the order
+    serial loading would call them, so actions and discriminator
+    conflicts are the same as when loading serially.
+
+    Workers leave the strings which name values to interpolate as they
+    are: each is interpolated in this process just before the
+    directive it belongs to is called.  A file may therefore use a
+    name one of its own directives (or a file it includes) redefines,
+    as it may when loading serially.  A file a worker fails to parse
+    is parsed in this process, like the first file.
+
+    If ``cache`` is a ``repoze.configuration.cache.ParseCache``, it is
+    consulted before parsing any file, and files parsed are stored in
+    it.
+    """
+    def __init__(self, processes=None, cache=None):
+        self.processes = processes or None # 0 means one per CPU
+        self.cache = cache
+        self.pool = None
+        self.pending = {}
+        self._checked_loader = None
+        self._loader_picklable = False
+
+    def lookup(self, context, filename, frame):
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.lookup(context, filename, frame)
+        key = declarations_key(filename, frame['package'], frame['override'])
+        return ParallelEntry(self, context, frame, cached,
+                             self.pending.pop(key, None))
+
+    def prefetch(self, context, declarations):
+        """ Hand the files included by ``declarations`` to the worker
+        pool.  Their structures may hold ``Deferred`` strings.  Must be
+        called with the stack frame of the file which contains
+        ``declarations`` pushed."""
+        if not self.picklable(context.loader):
+            return
+        directives = context.get_directives()
+        saved = context.interpolated
+        context.interpolated = None
+        try:
+            for tag, structure, span in declarations:
+                if directives.get(tag) is not include:
+                    continue
+                try:
+                    structure = interpolate_deferred(context, structure)
+                    declaration = DetachedDeclaration(context, structure,
+                                                      span)
+                    filename, package, override = include_arguments(
+                        declaration)
+                    fn = context.abs_filename(filename, package)
+                except (ConfigurationError, ImportError, KeyError):
+                    # raised again (properly) when the include is called
+                    continue
+                frame = {'filename':filename, 'package':package,
+                         'override':override, 'here':os.path.dirname(fn)}
+                if self.cache is not None:
+                    entry = self.cache.lookup(context, fn, frame)
+                    if entry.declarations is not None:
+                        continue
+                key = declarations_key(fn, package, override)
+                if key in self.pending:
+                    continue
+                if self.pool is None:
+                    self.pool = multiprocessing.Pool(self.processes)
+                if package is not None:
+                    frame['package'] = package.__name__
+                args = (context.loader, fn, frame)
+                self.pending[key] = self.pool.apply_async(parse, args)
+        finally:
+            context.interpolated = saved
+
+    def picklable(self, loader):
+        if loader is not self._checked_loader:
+            try:
+                cPickle.dumps(loader, 2)
+                self._loader_picklable = True
+            except Exception:
+                self._loader_picklable = False
+            self._checked_loader = loader
+        return self._loader_picklable
+
+    def close(self):
+        """ Shut down the worker pool """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.pending.clear()
+
+class ParallelEntry(object):
+    def __init__(self, parser, context, frame, cached, pending):
+        self.parser = parser
+        self.context = context
+        self.frame = frame
+        self.cached = cached
+        self.pending = pending
+        self.deferred = False
+        self._declarations = None
+
+    @property
+    def declarations(self):
+        if self._declarations is None:
+            if self.cached is not None:
+                self._declarations = self.cached.declarations
+            if self._declarations is None and self.pending is not None:
+                declarations = self.pending.get()
+                self.pending = None
+                if (declarations is not None and
+                    valid(self.context, self.frame, declarations, {})):
+                    self._declarations = declarations
+                    self.deferred = True
+        return self._declarations
+
+    def load(self, context, stream, loader):
+        declarations = self.declarations
+        if declarations is None:
+            self.parse(context, stream, loader)
+            return
+        self.parser.prefetch(context, declarations)
+        if self.deferred:
+            self.replay(context, declarations, loader)
+        else:
+            context.replay(declarations, loader)
+
+    def parse(self, context, stream, loader):
+        """ Parse ``stream`` calling its directives, as serial loading
+        does.  The YAML documents in it are composed first, so the
+        files its ``!include`` documents name are handed to the worker
+        pool before any of its directives is called."""
+        declarations = []
+        saved = context.interpolated
+        context.interpolated = {}
+        try:
+            parser = loader(context, stream, declarations=declarations,
+                            lazy=True)
+            nodes = []
+            error = None
+            try:
+                while parser.check_node():
+                    nodes.append(parser.get_node())
+            except Exception:
+                # raised once the documents before it have been
+                # constructed, as when loading serially
+                error = sys.exc_info()
+            if self.parser.picklable(context.loader):
+                self.parser.prefetch(context,
+                                     find_includes(context, loader, nodes))
+            for node in nodes:
+                parser.construct_document(node)
+            if error is not None:
+                raise error[0], error[1], error[2]
+            interpolated = context.interpolated
+        finally:
+            context.interpolated = saved
+        if self.cached is not None:
+            self.cached.store(declarations, interpolated)
+
+    def replay(self, context, declarations, loader):
+        """ Replay the ``declarations`` a worker found, interpolating
+        the structure of each just before its directive is called """
+        replayed = []
+        saved = context.interpolated
+        context.interpolated = {}
+        try:
+            context.replay(self.interpolate(context, declarations,
+                                            replayed), loader)
+            interpolated = context.interpolated
+        finally:
+            context.interpolated = saved
+        if self.cached is not None:
+            self.cached.store(replayed, interpolated)
+
+    def interpolate(self, context, declarations, replayed):
+        for tag, structure, span in declarations:
+            try:
+                structure = interpolate_deferred(context, structure)
+            except KeyError, why:
+                li = DetachedDeclaration(context, structure, span).lineinfo
+                msg = 'Cannot interpolate %%(%s)s found in %s' % (why[0], li)
+                raise ConfigurationError(msg)
+            if self.cached is not None:
+                # copy: the directive may mutate its structure
+                replayed.append((tag, copy.deepcopy(structure), span))
+            yield tag, structure, span
+
+class Deferred(object):
+    """ A string found by a worker which names values to interpolate.
+    It is interpolated in the loading process, just before the
+    directive whose structure holds it is called."""
+    def __init__(self, value):
+        self.value = value
+
+def defer(value):
+    """ Used as the ``interpolate`` method of the context a worker
+    parses with: return ``value`` as ``Context.interpolate`` would if
+    it names no values, otherwise a ``Deferred`` string."""
+    template = compile_template(value)
+    if template.names is None:
+        return template.literal
+    return Deferred(value)
+
+def interpolate_deferred(context, structure):
+    """ Return a copy of ``structure`` with each ``Deferred`` string in
+    it interpolated by ``context``.  Raise a ``KeyError`` naming a name
+    ``context`` can't interpolate."""
+    if isinstance(structure, Deferred):
+        return context.interpolate(structure.value)
+    if isinstance(structure, dict):
+        return dict([ (interpolate_deferred(context, key),
+                       interpolate_deferred(context, value))
+                      for key, value in structure.iteritems() ])
+    if isinstance(structure, list):
+        return [ interpolate_deferred(context, item) for item in structure ]
+    if isinstance(structure, set):
+        return set([ interpolate_deferred(context, item)
+                     for item in structure ])
+    return structure
+
+def deferring_context(loader):
+    """ Return a context for ``loader`` which leaves the strings naming
+    values to interpolate as ``Deferred`` strings """
+    from repoze.configuration.context import Context
+    context = Context(_loader=loader)
+    context.interpolate = defer
+    return context
+
+def find_includes(context, loader, nodes):
+    """ Return the ``(tag, structure, span)`` declarations of the
+    ``!include`` documents among the YAML document ``nodes``, leaving
+    their strings as ``Deferred`` strings.  No directive is called."""
+    from yaml import YAMLError
+    directives = context.get_directives(loader)
+    nodes = [ node for node in nodes if directives.get(node.tag) is include ]
+    if not nodes:
+        return []
+    recorder = loader(deferring_context(loader), '', declarations=[],
+                      call_directives=False)
+    for node in nodes:
+        try:
+            recorder.construct_document(node)
+        except YAMLError:
+            # raised again, in order, when the document is constructed
+            # calling its directives
+            pass
+    return recorder.declarations
+
+def parse(loader, fn, frame):
+    """ Parse absolute ``fn`` in a worker process.  ``frame`` is the
+    stack frame to parse it with, naming its package by dotted name.
+    Return the list of ``(tag, structure, span)`` declarations found
+    in it, the strings naming values to interpolate left as
+    ``Deferred`` strings, or ``None`` if the file can't be parsed."""
+    try:
+        package_name = frame['package']
+        if package_name is not None:
+            __import__(package_name)
+            frame['package'] = sys.modules[package_name]
+        context = deferring_context(loader)
+        context.stack.append(frame)
+        stream = open(fn)
+        try:
+            declarations, interpolated = parse_declarations(
+                context, stream, loader, call_directives=False)
+            return declarations
+        finally:
+            stream.close()
+    except Exception:
+        return None
@@ -0,0 +1,135 @@
+import logging
+import sys
+
+EP_GROUP = 'repoze.configuration.directive'
+
+_ambiguous = object()
+
+class DirectiveRegistry(object):
+    """
+    The directives registered as entry points in ``group``.  Entry
+    points are scanned once, the first time the registry is asked for
+    its directives; the result is kept until ``invalidate`` is called.
+    An entry point is not loaded until its directive is first called
+    unless its module has already been imported (see ``points``).
+    Consumers may also keep tables computed from the directives in the
+    registry using ``derived``; these are discarded by ``invalidate``
+    too.
+    """
+    def __init__(self, iter_entry_points=None, group=EP_GROUP):
+        if iter_entry_points is None:
+            import pkg_resources # slow to import: not needed until now
+            iter_entry_points = pkg_resources.iter_entry_points
+        self.iter_entry_points = iter_entry_points
+        self.group = group
+        self.invalidate()
+
+    def invalidate(self, *arg):
+        """ Forget everything computed from the entry points.  Accepts
+        (and ignores) positional arguments so it can be used as a
+        ``pkg_resources.working_set`` subscriber."""
+        self._points = None
+        self._tags = None
+        self._names = None
+        self._derived = {}
+
+    def points(self):
+        """ Return a list of ``(name, directive)`` pairs, one for each
+        entry point.  An entry point whose module has not been imported
+        yet is not loaded: its directive is a ``LazyDirective`` which
+        loads it when it is first called.  Other entry points are
+        loaded right away, and skipped if they can't be loaded."""
+        if self._points is None:
+            points = []
+            for point in list(self.iter_entry_points(self.group)):
+                module_name = getattr(point, 'module_name', None)
+                if module_name is not None and module_name not in sys.modules:
+                    points.append((point.name, LazyDirective(point)))
+                    continue
+                try:
+                    points.append((point.name, point.load()))
+                except ImportError:
+                    _log_import_error(point)
+            self._points = points
+        return self._points
+
+    def tags(self):
+        """ Return a mapping of YAML tag to directive.  Entry point
+        names which start with ``tag:`` are used as YAML tags verbatim;
+        other names are turned into local tags by prepending ``!``.
+        If more than one entry point has the same name, the last one
+        wins."""
+        if self._tags is None:
+            tags = {}
+            for name, directive in self.points():
+                if not name.startswith('tag:'):
+                    name = '!' + name
+                tags[name] = directive
+            self._tags = tags
+        return self._tags
+
+    def names(self):
+        """ Return a mapping of entry point name to directive.  The
+        directive for a name declared by more than one entry point is
+        the ``_ambiguous`` marker."""
+        if self._names is None:
+            names = {}
+            for name, directive in self.points():
+                if name in names:
+                    logging.warn(
+                        "Directive name declared more than once: %s.  " % name
+                    )
+                    names[name] = _ambiguous # force explicitness
+                else:
+                    names[name] = directive
+            self._names = names
+        return self._names
+
+    def derived(self, key, factory):
+        """ Return ``factory(self)``, computing it only once per ``key``
+        until the registry is invalidated."""
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = factory(self)
+            return value
+
+class LazyDirective(object):
+    """ Stands in for the directive of an entry point whose module has
+    not been imported, importing it the first time it is called """
+    def __init__(self, point):
+        self.point = point
+        self.directive = None
+
+    def load(self):
+        """ Load and return the directive.  Raise ``ImportError`` if
+        it can't be imported."""
+        if self.directive is None:
+            self.directive = self.point.load()
+        return self.directive
+
+    def __call__(self, declaration):
+        try:
+            directive = self.load()
+        except ImportError, why:
+            _log_import_error(self.point)
+            declaration.error('Could not import directive "%s": %s' % (
+                self.point, why))
+        return directive(declaration)
+
+def _log_import_error(point):
+    logging.info('Could not import repoze.configuration.directive '
+                 'entry point "%s"' % point)
+
+_registry = None
+
+def get_registry():
+    """ Return the process-wide registry of directives registered in
+    the default working set.  The registry is invalidated when a
+    distribution is added to the working set."""
+    global _registry
+    if _registry is None:
+        import pkg_resources
+        _registry = DirectiveRegistry()
+        pkg_resources.working_set.subscribe(_registry.invalidate)
+    return _registry
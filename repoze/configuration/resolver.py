@@ -0,0 +1,51 @@
+import sys
+
+class Resolver(object):
+    """
+    Resolves absolute dotted names (``package.module`` or
+    ``package.module:attr.attr``) to objects, remembering each object
+    resolved.  ``hits`` and ``misses`` count the names found and not
+    found in the cache.  Each ``repoze.configuration.context.Context``
+    has its own resolver unless one is passed to it as ``_resolver``;
+    a resolver may be shared by any number of contexts.
+    """
+    def __init__(self):
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, dottedname):
+        """ Return the object named by ``dottedname``.  Raise an
+        ``ImportError`` if it can't be imported."""
+        try:
+            result = self.cache[dottedname]
+        except KeyError:
+            self.misses += 1
+            result = self.cache[dottedname] = resolve_dotted(dottedname)
+        else:
+            self.hits += 1
+        return result
+
+    def clear(self):
+        """ Forget the objects resolved so far """
+        self.cache.clear()
+
+def resolve_dotted(dottedname):
+    """ Import and return the object named by the absolute dotted name
+    ``dottedname``.  Without a colon, the name is that of a module;
+    otherwise the part after the colon names an attribute (or dotted
+    attributes) of the module named by the part before it."""
+    if ':' in dottedname:
+        module_name, attrs = dottedname.split(':', 1)
+        attrs = attrs.strip().split('.')
+    else:
+        module_name, attrs = dottedname, ()
+    module_name = module_name.strip()
+    __import__(module_name)
+    result = sys.modules[module_name]
+    for attr in attrs:
+        try:
+            result = getattr(result, attr)
+        except AttributeError:
+            raise ImportError('%r has no %r attribute' % (result, attr))
+    return result
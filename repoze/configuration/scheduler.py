@@ -0,0 +1,141 @@
+import Queue
+import sys
+import threading
+
+from repoze.configuration.exceptions import ConfigurationError
+from repoze.configuration.exceptions import ConfigurationExecutionError
+
+def action_graph(actions):
+    """ Return a list containing, for each action in ``actions``, the
+    set of the indexes of the actions which must be executed before
+    it.
+
+    An action whose ``depends`` is ``None`` (the default) is a
+    barrier: it runs after every action that precedes it, and every
+    action that follows it runs after it.  An action whose ``depends``
+    is a sequence of discriminators runs after the preceding barrier
+    and after every action registered with one of those
+    discriminators."""
+    by_discriminator = {}
+    for i, action in enumerate(actions):
+        if action.discriminator is not None:
+            by_discriminator.setdefault(action.discriminator, []).append(i)
+
+    graph = []
+    barrier = None
+    since_barrier = []
+    for i, action in enumerate(actions):
+        if action.depends is None:
+            # the actions since the last barrier all run after it
+            predecessors = set(since_barrier)
+            if barrier is not None and not since_barrier:
+                predecessors.add(barrier)
+            barrier = i
+            since_barrier = []
+        else:
+            predecessors = set()
+            if barrier is not None:
+                predecessors.add(barrier)
+            for discriminator in action.depends:
+                if discriminator not in by_discriminator:
+                    raise ConfigurationError(
+                        'Action depends on unknown discriminator %r\n%s' % (
+                        discriminator, action.declaration.lineinfo))
+                predecessors.update(by_discriminator[discriminator])
+            predecessors.discard(i)
+            since_barrier.append(i)
+        graph.append(predecessors)
+    return graph
+
+def execute_parallel(actions, workers):
+    """ Execute ``actions`` using ``workers`` threads, honoring the
+    dependencies computed by ``action_graph``.  If an action raises an
+    exception, no further actions are started and a
+    ``ConfigurationExecutionError`` is raised for the first failure
+    once the actions already running have finished."""
+    graph = action_graph(actions)
+    waiting_on = [ len(predecessors) for predecessors in graph ]
+    successors = [ [] for action in actions ]
+    for i, predecessors in enumerate(graph):
+        for j in predecessors:
+            successors[j].append(i)
+
+    ready = [ i for i, count in enumerate(waiting_on) if count == 0 ]
+    _check_cycles(actions, waiting_on, successors, ready)
+
+    tasks = Queue.Queue()
+    results = Queue.Queue()
+
+    def work():
+        while True:
+            i = tasks.get()
+            if i is None:
+                return
+            try:
+                actions[i].execute()
+            except BaseException:
+                # even SystemExit or KeyboardInterrupt: the main loop
+                # would otherwise wait for this result forever
+                results.put((i, sys.exc_info()))
+            else:
+                results.put((i, None))
+
+    threads = []
+    for n in range(min(workers, len(actions))):
+        thread = threading.Thread(target=work)
+        thread.setDaemon(True)
+        thread.start()
+        threads.append(thread)
+
+    failure = None
+    running = 0
+    try:
+        while True:
+            if failure is None:
+                ready.sort()
+                for i in ready:
+                    tasks.put(i)
+                running += len(ready)
+                ready = []
+            if not running:
+                break
+            i, exc_info = results.get()
+            running -= 1
+            if exc_info is not None:
+                if failure is None:
+                    failure = (i, exc_info)
+                continue
+            for j in successors[i]:
+                waiting_on[j] -= 1
+                if waiting_on[j] == 0:
+                    ready.append(j)
+    finally:
+        for thread in threads:
+            tasks.put(None)
+
+    if failure is not None:
+        i, (typ, value, tb) = failure
+        if not isinstance(value, Exception):
+            # not wrapped, as when executing serially
+            raise typ, value, tb
+        error = ConfigurationExecutionError(actions[i].declaration, value)
+        raise error, None, tb
+
+def _check_cycles(actions, waiting_on, successors, ready):
+    # raise before anything is executed if some actions can never run
+    waiting_on = waiting_on[:]
+    ready = ready[:]
+    reached = 0
+    while ready:
+        i = ready.pop()
+        reached += 1
+        for j in successors[i]:
+            waiting_on[j] -= 1
+            if waiting_on[j] == 0:
+                ready.append(j)
+    if reached < len(actions):
+        stuck = [ actions[i].declaration.lineinfo
+                  for i, count in enumerate(waiting_on) if count ]
+        raise ConfigurationError(
+            'Circular action dependencies among:\n\n%s' %
+            '\n\n'.join(stuck))
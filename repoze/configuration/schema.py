@@ -0,0 +1,139 @@
+class Field(object):
+    """
+    A key of a directive's mapping structure.  ``default`` is the value
+    of the key when it is missing; a ``required`` key may not be
+    missing.  Subclasses convert (and check) the value found in the
+    structure in ``convert``.
+    """
+    def __init__(self, name, default=None, required=False):
+        self.name = name
+        self.default = default
+        self.required = required
+
+    def convert(self, value):
+        """ Return ``value`` converted, or raise ``ValueError`` with a
+        message describing why it can't be """
+        return value
+
+class Value(Field):
+    """ A value of any of ``types`` (of any type, if ``types`` is
+    empty), returned as is.  See ``Declaration.getvalue``."""
+    def __init__(self, name, default=None, required=False, types=()):
+        Field.__init__(self, name, default, required)
+        self.types = types
+
+    def convert(self, value):
+        if self.types and not isinstance(value, self.types):
+            raise ValueError(
+                '"%s" attribute type is not one of the types %s: %r' % (
+                self.name, self.types, value))
+        return value
+
+class String(Value):
+    """ A string.  See ``Declaration.string``."""
+    def __init__(self, name, default=None, required=False):
+        Value.__init__(self, name, default, required, (basestring,))
+
+class Boolean(Field):
+    """ A boolean: a string is true if it is any of ``('t', 'true',
+    'yes', 'on', '1')``, another value if ``bool(value)`` is.  See
+    ``Declaration.boolean``."""
+    def __init__(self, name, default=False, required=False):
+        Field.__init__(self, name, default, required)
+
+    def convert(self, value):
+        if isinstance(value, basestring):
+            return value.lower() in ('t', 'true', 'yes', 'on', '1')
+        return bool(value)
+
+class Integer(Field):
+    """ An integer, or a string which can be converted to one.  See
+    ``Declaration.integer``."""
+    def convert(self, value):
+        if isinstance(value, (basestring, int, long)):
+            try:
+                return int(value)
+            except ValueError:
+                pass
+        raise ValueError('%s with value %s cannot be converted to an integer'
+                         % (self.name, value))
+
+class SchemaResult(dict):
+    """ The converted values of a structure, keyed by field name.  Each
+    can also be read as an attribute."""
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+class Schema(object):
+    """
+    The expected mapping structure of a directive, defined once as a
+    sequence of ``Field`` instances, for example:
+
+    .. code-block:: python
+
+       schema = Schema(String('charset', 'utf-8'), Boolean('debug_mode'))
+
+       def appsettings(declaration):
+           settings = schema.validate(declaration)
+           ...settings.charset, settings.debug_mode...
+
+    ``validate`` makes a single pass over the structure, converting each
+    value with its field, instead of one ``getvalue`` (or ``string``,
+    ``boolean`` or ``integer``) call per key after ``expect``.  Keys
+    not in the schema are errors, unless ``extra`` is true; then they
+    are returned unconverted.
+    """
+    def __init__(self, *fields, **kw):
+        self.fields = fields
+        self.extra = kw.pop('extra', False)
+        if kw:
+            raise TypeError('unexpected keyword arguments %r' % kw.keys())
+        self._fields = dict([ (field.name, field) for field in fields ])
+        self._defaults = dict([ (field.name, field.default)
+                                for field in fields if not field.required ])
+        self._required = [ field.name for field in fields if field.required ]
+
+    def validate(self, declaration):
+        """ Return a ``SchemaResult`` holding the converted values of
+        the structure of ``declaration``, and the defaults of the
+        fields missing from it.  Raise a ``ConfigurationError`` (using
+        ``declaration.error``) describing every problem found if the
+        structure isn't valid."""
+        structure = declaration.structure
+        if not isinstance(structure, dict):
+            declaration.error(
+                'Bad structure for directive (%s instead of %s)' %
+                (type(structure), dict))
+        result = SchemaResult(self._defaults)
+        fields = self._fields
+        errors = []
+        unknown = []
+        for name, value in structure.iteritems():
+            field = fields.get(name)
+            if field is None:
+                if self.extra:
+                    result[name] = value
+                else:
+                    unknown.append(name)
+                continue
+            if value is field.default:
+                # e.g. an explicit null for a field without a default:
+                # returned as is, like ``Declaration.getvalue`` does
+                result[name] = value
+                continue
+            try:
+                result[name] = field.convert(value)
+            except ValueError, why:
+                errors.append(str(why))
+        if unknown:
+            errors.insert(0, 'Unknown key(s) in directive: %r' %
+                          sorted(unknown))
+        for name in self._required:
+            if name not in structure:
+                errors.append('"%s" attribute is required' % name)
+        if errors:
+            declaration.error('\n'.join(errors))
+        return result
@@ -0,0 +1,157 @@
+""" The ``repoze-config`` command: check, profile, benchmark and count
+the contents of a configuration file and the files it includes.
+"""
+import optparse
+import sys
+import time
+
+from repoze.configuration.context import Context
+from repoze.configuration.exceptions import ConfigurationError
+from repoze.configuration.instrument import LoadInstrument
+
+USAGE = """\
+%prog COMMAND [options] FILENAME
+       %prog validate [options] FILENAME...
+
+Commands:
+
+  check    load the configuration (without executing it) and report
+           every discriminator conflict
+  profile  load the configuration and print the time spent in each
+           file and directive, and the include tree
+  bench    time repeated loads and executions of the configuration
+  stats    print the number of files, actions and discriminators
+  validate check many configurations in a pool of processes and print
+           a summary of their errors"""
+
+def check(context, filename, package, out):
+    """ Load ``filename`` into ``context`` (which should collect
+    conflicts) without executing it """
+    context.load(filename, package)
+    out.write('OK: %d files, %d actions\n' % (
+        len(context.includes.edges), len(context.actions)))
+
+def profile(context, filename, package, out):
+    """ Load ``filename`` into ``context`` with a ``LoadInstrument`` and
+    print its report """
+    instrument = context.instrument = LoadInstrument()
+    context.load(filename, package)
+    report = instrument.report()
+    out.write('%8s %8s %6s %6s  %s\n' % ('time', 'self', 'dirs', 'acts',
+                                         'file'))
+    def write_file(record):
+        out.write('%8.4f %8.4f %6d %6d  %s%s\n' % (
+            record['time'], record['self_time'],
+            record['cumulative_directives'], record['cumulative_actions'],
+            '  ' * record['depth'], record['filename']))
+        for include in record['includes']:
+            write_file(include)
+    for record in report['files']:
+        write_file(record)
+    out.write('\n%8s %6s  %s\n' % ('time', 'calls', 'directive'))
+    directives = sorted(report['directives'].items(),
+                        key=lambda item: item[1]['time'], reverse=True)
+    for tag, stats in directives:
+        out.write('%8.4f %6d  %s\n' % (stats['time'], stats['count'], tag))
+
+def bench(make_context, filename, package, out, repeat=10, timer=time.time):
+    """ Load ``filename`` into ``repeat`` contexts made by
+    ``make_context`` and execute them, printing the best and mean
+    times of each """
+    loads = []
+    executions = []
+    for i in range(repeat):
+        context = make_context()
+        start = timer()
+        context.load(filename, package)
+        loaded = timer()
+        context.execute()
+        executions.append(timer() - loaded)
+        loads.append(loaded - start)
+    for name, times in (('load', loads), ('execute', executions)):
+        out.write('%-8s best %.4fs  mean %.4fs  (%d runs)\n' % (
+            name, min(times), sum(times) / len(times), len(times)))
+
+def stats(context, filename, package, out):
+    """ Load ``filename`` into ``context`` and print the number of
+    files, actions and discriminators """
+    context.load(filename, package)
+    includes = context.includes
+    discriminated = len([ action for action in context.actions
+                          if action.discriminator is not None ])
+    for name, value in (
+        ('files', len(includes.edges)),
+        ('file loads', sum(includes.counts.values())),
+        ('actions', len(context.actions)),
+        ('discriminated actions', discriminated),
+        ('discriminators', len(context.discriminators)),
+        ):
+        out.write('%-22s %d\n' % (name + ':', value))
+
+def validate(filenames, package, out, processes=None):
+    """ Check the configuration files ``filenames`` with
+    ``repoze.configuration.validate.validate``, printing the errors of
+    each which fails and a summary.  Return the number which failed."""
+    from repoze.configuration.validate import validate
+    results = validate([ (filename, package) for filename in filenames ],
+                       processes)
+    failed = 0
+    for (filename, package), error in results:
+        if error is not None:
+            failed += 1
+            out.write('FAILED %s\n\n    %s\n\n' % (
+                filename, error.replace('\n', '\n    ')))
+    out.write('%d of %d configurations failed\n' % (failed, len(results)))
+    return failed
+
+COMMANDS = ('check', 'profile', 'bench', 'stats', 'validate')
+
+def main(argv=sys.argv, out=None, err=None, make_context=Context):
+    if out is None:
+        out = sys.stdout
+    if err is None:
+        err = sys.stderr
+    parser = optparse.OptionParser(usage=USAGE)
+    parser.add_option('-p', '--package', metavar='PACKAGE',
+                      help='dotted name of the package FILENAME is in')
+    parser.add_option('-n', '--repeat', type='int', default=10,
+                      help='number of runs of "bench"')
+    parser.add_option('-j', '--processes', type='int', default=0,
+                      help='number of processes of "validate" '
+                      '(default: one per CPU)')
+    options, args = parser.parse_args(argv[1:])
+    if len(args) < 2 or args[0] not in COMMANDS or (
+        len(args) > 2 and args[0] != 'validate'):
+        parser.print_usage(err)
+        return 2
+    if options.repeat < 1:
+        parser.print_usage(err)
+        err.write('--repeat must be at least 1\n')
+        return 2
+    command, filename = args[:2]
+
+    from yaml import YAMLError
+    package = None
+    try:
+        if options.package:
+            __import__(options.package)
+            package = sys.modules[options.package]
+        if command == 'check':
+            check(make_context(_collect_conflicts=True), filename, package,
+                  out)
+        elif command == 'profile':
+            profile(make_context(), filename, package, out)
+        elif command == 'bench':
+            bench(make_context, filename, package, out, options.repeat)
+        elif command == 'validate':
+            if validate(args[1:], options.package, out, options.processes):
+                return 1
+        else:
+            stats(make_context(), filename, package, out)
+    except (ConfigurationError, YAMLError, ImportError, IOError), why:
+        err.write('%s: %s\n' % (why.__class__.__name__, why))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import cPickle
+import sys
+import zlib
+
+from repoze.configuration.cache import CacheEntry
+from repoze.configuration.cache import declarations_key
+from repoze.configuration.exceptions import ConfigurationError
+
+class SnapshotRecorder(object):
+    """
+    A context cache which records the declarations of each file loaded
+    into a context, so that ``snapshot`` can write them out.  Pass an
+    instance as the ``cache`` argument of ``repoze.configuration.load``
+    or ``repoze.configuration.execute`` (or as the ``_cache`` argument
+    of a ``Context``) before loading.  If ``cache`` is a
+    ``repoze.configuration.cache.ParseCache``, it is consulted and
+    updated as usual.
+
+    The items of the context when the first file is loaded into it are
+    recorded too.
+    """
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.files = {}
+        self.data = None
+        self.unpicklable = []
+
+    def lookup(self, context, filename, frame):
+        if self.data is None and not context.stack:
+            self.record_data(context)
+        key = declarations_key(filename, frame['package'], frame['override'])
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.lookup(context, filename, frame)
+        entry = RecordingEntry(self, key, entry)
+        if entry.declarations is not None:
+            self.record(key, entry.declarations)
+        return entry
+
+    def record_data(self, context):
+        self.data = {}
+        for name, value in context.items():
+            try:
+                self.data[name] = cPickle.dumps(value, 2)
+            except Exception:
+                self.unpicklable.append(name)
+
+    def record(self, key, declarations):
+        # pickled right away: directives may mutate the structures
+        # replayed to them
+        self.files[key] = cPickle.dumps(declarations, 2)
+
+class RecordingEntry(CacheEntry):
+    def __init__(self, recorder, key, entry):
+        self.recorder = recorder
+        self.key = key
+        self.entry = entry
+        if entry is not None:
+            self.declarations = entry.declarations
+
+    def store(self, declarations, interpolated):
+        self.recorder.record(self.key, declarations)
+        if self.entry is not None:
+            self.entry.store(declarations, interpolated)
+
+class SnapshotCache(object):
+    """ A context cache which replays the declarations of a snapshot
+    and refuses to parse anything else """
+    def __init__(self, files):
+        self.files = files
+
+    def lookup(self, context, filename, frame):
+        key = declarations_key(filename, frame['package'], frame['override'])
+        if key not in self.files:
+            raise ConfigurationError(
+                'File "%s" is not in the snapshot' % filename)
+        entry = CacheEntry(None, key, None)
+        # a fresh copy for each load of the file
+        entry.declarations = cPickle.loads(self.files[key])
+        return entry
+
+def snapshot(context, filename):
+    """ Write a snapshot of ``context`` to ``filename``.  The context
+    must have been loaded with a ``SnapshotRecorder`` as its cache.
+
+    The snapshot contains the items the context had before loading,
+    the files loaded into it (with the package and override state they
+    were loaded with), the declarations in each file, and the
+    discriminators of the actions registered.  Items which can't be
+    pickled are left out; they must be supplied to ``restore``."""
+    recorder = context.cache
+    if not isinstance(recorder, SnapshotRecorder):
+        raise ConfigurationError(
+            'Only a context loaded with a SnapshotRecorder as its cache '
+            'can be snapshotted')
+    roots = []
+    for name, package, override, loader in context.roots:
+        if package is not None:
+            package = package.__name__
+        roots.append((name, package, override))
+    data = {'data':recorder.data or {},
+            'unpicklable':recorder.unpicklable,
+            'roots':roots,
+            'files':recorder.files,
+            'discriminators':[ action.discriminator
+                               for action in context.actions ]}
+    f = open(filename, 'wb')
+    try:
+        f.write(zlib.compress(cPickle.dumps(data, 2)))
+    finally:
+        f.close()
+
+def restore(filename, context=None, loader=None):
+    """ Load the snapshot written to ``filename`` by ``snapshot`` into
+    ``context`` (by default, a new ``Context`` using ``loader``) and
+    return the context.  Its actions are not executed.
+
+    No configuration file is parsed: the directives recorded in the
+    snapshot are called again, in order, with the structures recorded,
+    and register their actions again.  The context's own items take
+    precedence over the items in the snapshot.  A
+    ``ConfigurationError`` is raised if the snapshot lacks an item the
+    context doesn't supply, or if the directives don't register
+    actions with the same discriminators as when the snapshot was
+    taken."""
+    from repoze.configuration.context import Context
+    f = open(filename, 'rb')
+    try:
+        data = cPickle.loads(zlib.decompress(f.read()))
+    finally:
+        f.close()
+    if context is None:
+        context = Context(_loader=loader)
+    missing = [ name for name in data['unpicklable'] if name not in context ]
+    if missing:
+        raise ConfigurationError(
+            'The snapshot lacks these context items: %s' %
+            ', '.join(sorted(missing)))
+    for name, value in data['data'].items():
+        if name not in context:
+            context[name] = cPickle.loads(value)
+    saved = context.cache
+    context.cache = SnapshotCache(data['files'])
+    try:
+        for name, package, override in data['roots']:
+            if package is not None:
+                __import__(package)
+                package = sys.modules[package]
+            context.load(name, package, override)
+    finally:
+        context.cache = saved
+    discriminators = [ action.discriminator for action in context.actions ]
+    if discriminators != data['discriminators']:
+        raise ConfigurationError(
+            'The actions restored from the snapshot differ from the '
+            'actions snapshotted')
+    return context
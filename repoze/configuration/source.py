@@ -0,0 +1,112 @@
+class SourceCache(object):
+    """
+    The text of the configuration sources referred to by the spans of
+    declarations loaded into a context (see ``Context.sources``).  A
+    file is read at most once, the first time a snippet of it is
+    needed.  Sources which can't be read again by name, such as
+    package resources inside zipped eggs, are registered with
+    ``register`` when they are loaded.
+    """
+    def __init__(self):
+        self.texts = {}
+
+    def register(self, name, text):
+        """ Remember ``text`` (a string) as the content of the source
+        named ``name`` """
+        self.texts[name] = text
+
+    def text(self, name):
+        """ Return the text of the source named ``name``, or ``None``
+        if it can't be read """
+        try:
+            return self.texts[name]
+        except KeyError:
+            text = self.texts[name] = read_source(name)
+            return text
+
+def read_source(name):
+    """ Return the content of the file named ``name``, or ``None`` if it
+    can't be read """
+    try:
+        f = open(name, 'r')
+    except (OSError, IOError):
+        return None
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+class SourceBuffer(object):
+    """
+    A read-only stream over the text of a configuration source which
+    has already been read into memory, named ``name`` (the name spans
+    of the declarations parsed from it refer to).  The text is shared,
+    not copied.
+    """
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+        self.position = 0
+
+    def read(self, size=-1):
+        start = self.position
+        if size < 0:
+            end = len(self.text)
+        else:
+            end = min(start + size, len(self.text))
+        self.position = end
+        if start == 0 and end == len(self.text):
+            return self.text
+        return self.text[start:end]
+
+    def close(self):
+        pass
+
+class SourceSpan(tuple):
+    """
+    The location of a declaration in a configuration source: a
+    ``(filename, start_index, end_index, start_line, end_line)`` tuple
+    with a method which formats it for error messages.  Indexes and
+    line numbers start at zero.
+    """
+    __slots__ = ()
+
+    def __new__(cls, filename, start, end, start_line, end_line):
+        return tuple.__new__(cls, (filename, start, end, start_line,
+                                   end_line))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    @property
+    def filename(self):
+        return self[0]
+
+    def snippet(self, sources=None):
+        """ Return the source text spanned, or ``None`` if the source
+        can't be read.  ``sources`` is a ``SourceCache``; without one,
+        the source is read from its file."""
+        filename, start, end = self[:3]
+        if sources is None:
+            text = read_source(filename)
+        else:
+            text = sources.text(filename)
+        if text is None:
+            return None
+        return text[start:end]
+
+    def lineinfo(self, sources=None):
+        """ Return a string describing the span, starting with the text
+        spanned if it can be read """
+        filename, start, end, start_line, end_line = self
+        snippet = self.snippet(sources)
+        if snippet is None:
+            data = ''
+        else:
+            data = snippet + ' in '
+        return '%slines %s-%s of file "%s"' % (
+            data,
+            start_line+1,
+            end_line+1,
+            filename,
+            )
@@ -0,0 +1,56 @@
+""" Helpers shared by the tests which load configuration files written
+to a temporary directory """
+
+class TempdirMixin(object):
+    """ Mix into a ``unittest.TestCase`` to get a fresh ``tempdir`` for
+    each test """
+    def setUp(self):
+        import tempfile
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tempdir)
+
+    def _writeFile(self, name, text):
+        import os
+        filename = os.path.join(self.tempdir, name)
+        f = open(filename, 'w')
+        f.write(text)
+        f.close()
+        return filename
+
+class DummyPoint:
+    def __init__(self, name, directive, raise_load_exc=False,
+                 module_name=None):
+        self.name = name
+        self.directive = directive
+        self.raise_load_exc = raise_load_exc
+        self.module_name = module_name
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        if self.raise_load_exc:
+            raise ImportError('foo')
+        return self.directive
+
+def make_registry(**directives):
+    """ Return a ``DirectiveRegistry`` of the ``include`` directive and
+    ``directives``, keyed by entry point name """
+    from repoze.configuration.directives import include
+    from repoze.configuration.registry import DirectiveRegistry
+    points = [ DummyPoint('include', include) ]
+    for name, directive in sorted(directives.items()):
+        points.append(DummyPoint(name, directive))
+    def iter_entry_points(group):
+        return iter(points)
+    return DirectiveRegistry(iter_entry_points)
+
+def make_loader(**directives):
+    """ Return a ``YAMLPluginLoader`` subclass calling the ``include``
+    directive and ``directives``, keyed by entry point name """
+    from repoze.configuration.loader import YAMLPluginLoader
+    class Loader(YAMLPluginLoader):
+        registry = make_registry(**directives)
+    return Loader
@@ -33,10 +33,53 @@ class TestExecute(unittest.TestCase):
         self.failUnless(result.loaded, ('configure.yml', None))
         self.failUnless(result.executed)
 
+class TestIterload(unittest.TestCase):
+    def _callFUT(self, filename, package, context):
+        from repoze.configuration import iterload
+        return iterload(filename, package, context)
+
+    def test_no_context(self):
+        from repoze.configuration.tests import fixtures
+        result = list(self._callFUT('configure.yml', fixtures, None))
+        self.assertEqual(len(result), 1)
+        tag, structure, span, depth = result[0]
+        self.assertEqual(tag, '!include')
+        self.assertEqual(structure, {'filename':'another.yml'})
+        self.assertEqual(depth, 0)
+
+    def test_with_context(self):
+        context = DummyContext()
+        result = self._callFUT('configure.yml', None, context)
+        self.assertEqual(list(result), [('configure.yml', None)])
+
+class TestImport(unittest.TestCase):
+    def test_slow_modules_not_imported(self):
+        # importing the package must not import PyYAML or
+        # pkg_resources: together they dominate its import time (-S:
+        # an installed namespace .pth file would import the latter)
+        import os
+        import subprocess
+        import sys
+        import repoze.configuration
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(repoze.configuration.__file__))))
+        script = ('import sys; import repoze.configuration.context; '
+                  'print "yaml" in sys.modules, '
+                  '"pkg_resources" in sys.modules')
+        env = dict(os.environ)
+        env['PYTHONPATH'] = root
+        process = subprocess.Popen([sys.executable, '-S', '-c', script],
+                                   cwd=root, env=env, stdout=subprocess.PIPE)
+        output = process.communicate()[0]
+        self.assertEqual(output.split(), ['False', 'False'])
+
 class DummyContext:
     def load(self, filename, package):
         self.loaded = (filename, package)
 
+    def iterload(self, filename, package):
+        yield (filename, package)
+
     def execute(self):
         self.executed = True
         
@@ -0,0 +1,100 @@
+import unittest
+
+class TestFuture(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.background import Future
+        return Future
+
+    def _makeOne(self):
+        return self._getTargetClass()()
+
+    def test_result_not_done(self):
+        future = self._makeOne()
+        self.failIf(future.done())
+        self.assertRaises(RuntimeError, future.result, 0)
+        self.assertRaises(RuntimeError, future.exception, 0)
+
+    def test_result(self):
+        future = self._makeOne()
+        future._finish('result')
+        self.failUnless(future.done())
+        self.assertEqual(future.result(), 'result')
+        self.assertEqual(future.exception(), None)
+
+    def test_result_exception(self):
+        import sys
+        future = self._makeOne()
+        try:
+            raise ValueError('broken')
+        except ValueError:
+            future._finish(exc_info=sys.exc_info())
+        self.assertRaises(ValueError, future.result)
+        self.assertEqual(str(future.exception()), 'broken')
+
+    def test_add_done_callback(self):
+        future = self._makeOne()
+        called = []
+        future.add_done_callback(called.append)
+        self.assertEqual(called, [])
+        future._finish('result')
+        self.assertEqual(called, [future])
+        future.add_done_callback(called.append)
+        self.assertEqual(called, [future, future])
+
+class Test_start(unittest.TestCase):
+    def _callFUT(self, function, *arg):
+        from repoze.configuration.background import _start
+        return _start(function, *arg)
+
+    def test_result(self):
+        future = self._callFUT(lambda x: x * 2, 21)
+        self.assertEqual(future.result(5), 42)
+
+    def test_system_exit(self):
+        def exit():
+            raise SystemExit(3)
+        future = self._callFUT(exit)
+        self.assertRaises(SystemExit, future.result, 5)
+        self.failUnless(future.done())
+
+class Test_load(unittest.TestCase):
+    def _callFUT(self, filename, package, context=None):
+        from repoze.configuration.background import load
+        return load(filename, package, context)
+
+    def test_it(self):
+        from repoze.configuration.tests import fixtures
+        future = self._callFUT('configure.yml', fixtures)
+        self.assertEqual(future.result(5), {})
+
+    def test_with_context(self):
+        context = DummyContext()
+        future = self._callFUT('configure.yml', None, context)
+        self.assertEqual(future.result(5), context)
+        self.assertEqual(context.loaded, ('configure.yml', None))
+        self.assertEqual(context.executed, None)
+
+    def test_error(self):
+        future = self._callFUT('nonexistent.yml', None)
+        self.assertRaises(IOError, future.result, 5)
+
+class Test_execute(unittest.TestCase):
+    def _callFUT(self, filename, package, context=None, workers=None):
+        from repoze.configuration.background import execute
+        return execute(filename, package, context, workers=workers)
+
+    def test_it(self):
+        context = DummyContext()
+        future = self._callFUT('configure.yml', None, context, 4)
+        self.assertEqual(future.result(5), context)
+        self.assertEqual(context.loaded, ('configure.yml', None))
+        self.assertEqual(context.executed, 4)
+
+class DummyContext:
+    executed = None
+
+    def load(self, filename, package):
+        self.loaded = (filename, package)
+
+    def execute(self, workers=None):
+        self.executed = workers
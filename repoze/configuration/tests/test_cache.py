@@ -0,0 +1,305 @@
+import unittest
+
+from repoze.configuration.tests.helpers import TempdirMixin
+
+class TestParseCache(TempdirMixin, unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.cache import ParseCache
+        return ParseCache
+
+    def _makeOne(self):
+        import os
+        return self._getTargetClass()(os.path.join(self.tempdir, 'cache'))
+
+    def test_key_varies_with_package_and_override(self):
+        from repoze.configuration.tests import fixtures
+        cache = self._makeOne()
+        key1 = cache.key('/a.yml', None, False)
+        key2 = cache.key('/a.yml', fixtures, False)
+        key3 = cache.key('/a.yml', None, True)
+        self.assertEqual(len(set([key1, key2, key3])), 3)
+        self.assertEqual(key1, cache.key('/a.yml', None, False))
+
+    def test_signature_nonexistent(self):
+        cache = self._makeOne()
+        self.assertEqual(cache.signature('/nonexistent/file.yml'), None)
+
+    def test_get_miss(self):
+        cache = self._makeOne()
+        self.assertEqual(cache.get('key', (1, 2)), None)
+
+    def test_set_get(self):
+        cache = self._makeOne()
+        declarations = [('!foo', {'a':1}, ('f', 0, 1, 0, 0))]
+        cache.set('key', (1, 2), declarations, {'a':'1'})
+        data = cache.get('key', (1, 2))
+        self.assertEqual(data['declarations'], declarations)
+        self.assertEqual(data['interpolated'], {'a':'1'})
+
+    def test_get_signature_mismatch(self):
+        cache = self._makeOne()
+        cache.set('key', (1, 2), [], {})
+        self.assertEqual(cache.get('key', (1, 3)), None)
+
+    def test_get_corrupt(self):
+        cache = self._makeOne()
+        cache.set('key', (1, 2), [], {})
+        f = open(cache.path('key'), 'wb')
+        f.write('garbage')
+        f.close()
+        self.assertEqual(cache.get('key', (1, 2)), None)
+
+    def test_set_unwritable(self):
+        cache = self._getTargetClass()('/nonexistent/dir/cache')
+        cache.set('key', (1, 2), [], {}) # doesn't blow up
+
+    def _frame(self, **kw):
+        frame = {'filename':'a.yml', 'package':None, 'override':False,
+                 'here':self.tempdir}
+        frame.update(kw)
+        return frame
+
+    def test_lookup_miss_then_hit(self):
+        filename = self._writeFile('a.yml', '')
+        cache = self._makeOne()
+        context = DummyContext({'!foo':None})
+        entry = cache.lookup(context, filename, self._frame())
+        self.assertEqual(entry.declarations, None)
+        declarations = [('!foo', {'a':1}, (filename, 0, 1, 0, 0))]
+        entry.store(declarations, {})
+        entry = cache.lookup(context, filename, self._frame())
+        self.assertEqual(entry.declarations, declarations)
+
+    def test_lookup_unknown_tag(self):
+        filename = self._writeFile('a.yml', '')
+        cache = self._makeOne()
+        context = DummyContext({})
+        entry = cache.lookup(context, filename, self._frame())
+        entry.store([('!foo', {'a':1}, (filename, 0, 1, 0, 0))], {})
+        entry = cache.lookup(context, filename, self._frame())
+        self.assertEqual(entry.declarations, None)
+
+    def test_lookup_file_changed(self):
+        filename = self._writeFile('a.yml', '')
+        cache = self._makeOne()
+        context = DummyContext({'!foo':None})
+        entry = cache.lookup(context, filename, self._frame())
+        entry.store([('!foo', {'a':1}, (filename, 0, 1, 0, 0))], {})
+        self._writeFile('a.yml', '--- !foo\na: 1\n')
+        entry = cache.lookup(context, filename, self._frame())
+        self.assertEqual(entry.declarations, None)
+
+    def test_lookup_interpolation_changed(self):
+        filename = self._writeFile('a.yml', '')
+        cache = self._makeOne()
+        context = DummyContext({'!foo':None})
+        context['a'] = '1'
+        context['unused'] = '1'
+        entry = cache.lookup(context, filename, self._frame())
+        entry.store([('!foo', {'a':1}, (filename, 0, 1, 0, 0))],
+                    {'a':'1', 'here':self.tempdir})
+        context['unused'] = '2'
+        entry = cache.lookup(context, filename, self._frame())
+        self.failIf(entry.declarations is None)
+        entry = cache.lookup(context, filename, self._frame(here='/else'))
+        self.assertEqual(entry.declarations, None)
+        context['a'] = '2'
+        entry = cache.lookup(context, filename, self._frame())
+        self.assertEqual(entry.declarations, None)
+
+class TestMemoryParseCache(unittest.TestCase):
+    def _makeOne(self):
+        from repoze.configuration.cache import MemoryParseCache
+        return MemoryParseCache()
+
+    def test_set_get(self):
+        cache = self._makeOne()
+        declarations = [('!foo', {'a':1}, ('f', 0, 1, 0, 0))]
+        cache.set('key', (1, 2), declarations, {})
+        data = cache.get('key', (1, 2))
+        self.assertEqual(data['declarations'], declarations)
+        # a copy each time
+        data['declarations'][0][1]['a'] = 2
+        data = cache.get('key', (1, 2))
+        self.assertEqual(data['declarations'], declarations)
+
+    def test_get_miss(self):
+        cache = self._makeOne()
+        self.assertEqual(cache.get('key', (1, 2)), None)
+        cache.set('key', (1, 2), [], {})
+        self.assertEqual(cache.get('key', (1, 3)), None)
+
+    def test_set_no_signature(self):
+        cache = self._makeOne()
+        cache.set('key', None, [], {})
+        self.assertEqual(cache.entries, {})
+
+class TestCachedLoad(TempdirMixin, unittest.TestCase):
+    def _makeContext(self, directive, parsed):
+        import os
+        from repoze.configuration.context import Context
+        from repoze.configuration.cache import ParseCache
+        from repoze.configuration.tests.helpers import make_loader
+        Loader = make_loader(setting=directive)
+        def loader(context, stream, **kw):
+            parsed.append(stream.name)
+            return Loader(context, stream, **kw)
+        loader.registry = Loader.registry
+        cache = ParseCache(os.path.join(self.tempdir, 'cache'))
+        context = Context(_loader=loader, _cache=cache)
+        return context
+
+    def test_replay_without_parsing(self):
+        root = self._writeFile(
+            'root.yml',
+            '--- !setting\nname: a\nvalue: "%(here)s"\n'
+            '--- !include\nfilename: "%(here)s/child.yml"\n'
+            '--- !setting\nname: c\nvalue: 3\n')
+        child = self._writeFile('child.yml',
+                                '--- !setting\nname: b\nvalue: 2\n')
+        settings = []
+        def setting(declaration):
+            name = declaration.structure.pop('name')
+            settings.append((name, declaration.structure['value']))
+        parsed = []
+        context = self._makeContext(setting, parsed)
+        context.load(root, None)
+        self.assertEqual(parsed, [root, child])
+        cold = settings[:]
+        self.assertEqual(cold, [('a', self.tempdir), ('b', 2), ('c', 3)])
+        del settings[:]
+        parsed = []
+        context = self._makeContext(setting, parsed)
+        context.load(root, None)
+        self.assertEqual(parsed, [])
+        self.assertEqual(settings, cold)
+
+    def test_changed_include_reparsed(self):
+        root = self._writeFile(
+            'root.yml', '--- !include\nfilename: "%(here)s/child.yml"\n')
+        child = self._writeFile('child.yml',
+                                '--- !setting\nvalue: 1\n')
+        settings = []
+        def setting(declaration):
+            settings.append(declaration.structure['value'])
+        context = self._makeContext(setting, [])
+        context.load(root, None)
+        self._writeFile('child.yml', '--- !setting\nvalue: 22\n')
+        parsed = []
+        context = self._makeContext(setting, parsed)
+        context.load(root, None)
+        self.assertEqual(parsed, [child])
+        self.assertEqual(settings, [1, 22])
+
+    def test_redefined_name_records_first_value(self):
+        root = self._writeFile(
+            'root.yml',
+            '--- !setting\nvalue: "%(x)s"\n'
+            '--- !setting\nname: x\nvalue: b\n'
+            '--- !setting\nvalue: "%(x)s"\n')
+        settings = []
+        def setting(declaration):
+            name = declaration.structure.get('name')
+            value = declaration.structure['value']
+            if name is not None:
+                declaration.context[name] = value
+            settings.append(value)
+        context = self._makeContext(setting, [])
+        context['x'] = 'a'
+        context.load(root, None)
+        self.assertEqual(settings, ['a', 'b', 'b'])
+        del settings[:]
+        parsed = []
+        context = self._makeContext(setting, parsed)
+        context['x'] = 'b'
+        context.load(root, None)
+        self.assertEqual(parsed, [root])
+        self.assertEqual(settings, ['b', 'b', 'b'])
+
+    def test_replayed_declaration_lineinfo(self):
+        root = self._writeFile('root.yml', '--- !setting\nvalue: 1\n')
+        lineinfos = []
+        def setting(declaration):
+            lineinfos.append(declaration.lineinfo)
+        self._makeContext(setting, []).load(root, None)
+        self._makeContext(setting, []).load(root, None)
+        self.assertEqual(lineinfos[0], lineinfos[1])
+        self.failUnless(lineinfos[1].endswith(
+            'lines 1-3 of file "%s"' % root))
+
+class TestReload(TempdirMixin, unittest.TestCase):
+    def _makeContext(self, parsed):
+        from repoze.configuration.context import Context
+        from repoze.configuration.cache import MemoryParseCache
+        from repoze.configuration.tests.helpers import make_loader
+        def setting(declaration):
+            name = declaration.structure['name']
+            declaration.action(None, discriminator=name)
+        Loader = make_loader(setting=setting)
+        def loader(context, stream, **kw):
+            parsed.append(stream.name)
+            return Loader(context, stream, **kw)
+        loader.registry = Loader.registry
+        context = Context(_loader=loader, _cache=MemoryParseCache())
+        return context
+
+    def _load(self):
+        root = self._writeFile(
+            'root.yml',
+            '--- !setting\nname: a\n'
+            '--- !include\nfilename: "%(here)s/child.yml"\n')
+        child = self._writeFile(
+            'child.yml',
+            '--- !setting\nname: b\n--- !setting\nname: c\n')
+        parsed = []
+        context = self._makeContext(parsed)
+        context.load(root, None)
+        self.assertEqual(parsed, [root, child])
+        del parsed[:]
+        return context, parsed, root, child
+
+    def test_unchanged(self):
+        context, parsed, root, child = self._load()
+        actions = context.actions
+        delta = context.reload()
+        self.assertEqual(parsed, [])
+        self.failIf(delta)
+        self.assertEqual(len(context.actions), 3)
+        self.failIf(context.actions[0] is actions[0])
+
+    def test_changed_child(self):
+        context, parsed, root, child = self._load()
+        old = context.actions
+        self._writeFile(
+            'child.yml',
+            '--- !setting\nname: b\nvalue: 1\n--- !setting\nname: d\n')
+        delta = context.reload()
+        self.assertEqual(parsed, [child])
+        self.assertEqual([ a.discriminator for a in context.actions ],
+                         ['a', 'b', 'd'])
+        self.assertEqual(sorted(context.discriminators), ['a', 'b', 'd'])
+        self.assertEqual(delta.added, [context.actions[2]])
+        self.assertEqual(delta.removed, [old[2]])
+        self.assertEqual(delta.changed, [(old[1], context.actions[1])])
+
+    def test_failure_leaves_context_unchanged(self):
+        from repoze.configuration.exceptions import ConfigurationConflict
+        context, parsed, root, child = self._load()
+        actions = context.actions
+        discriminators = context.discriminators
+        sources = context.sources
+        self._writeFile(
+            'child.yml', '--- !setting\nname: a\n--- !setting\nname: c\n')
+        self.assertRaises(ConfigurationConflict, context.reload)
+        self.failUnless(context.actions is actions)
+        self.failUnless(context.discriminators is discriminators)
+        self.failUnless(context.sources is sources)
+        self.assertEqual(len(context.roots), 1)
+
+class DummyContext(dict):
+    interpolated = None
+    def __init__(self, directives):
+        self.directives = directives
+
+    def get_directives(self):
+        return self.directives
@@ -1,5 +1,7 @@
 import unittest
 
+from repoze.configuration.tests.helpers import TempdirMixin
+
 class TestContext(unittest.TestCase):
     def _getTargetClass(self):
         from repoze.configuration import Context
@@ -17,6 +19,11 @@ class TestContext(unittest.TestCase):
         self.assertEqual(context.stack, [])
         self.assertEqual(context.actions, [])
 
+    def test_ctor_default_loader(self):
+        from repoze.configuration.loader import DefaultLoader
+        context = self._makeOne()
+        self.assertEqual(context.loader, DefaultLoader)
+
     def test_registry(self):
         context = self._makeOne()
         self.assertEqual(context.registry, context)
@@ -52,6 +59,54 @@ class TestContext(unittest.TestCase):
         context = self._makeOne(data)
         self.assertRaises(KeyError, context.interpolate, 'Here is %(here)s')
 
+    def test_interpolate_literal_percent(self):
+        context = self._makeOne({'here':'/here'})
+        self.assertEqual(context.interpolate('100%'), '100%')
+        self.assertEqual(context.interpolate('%(here)s is 100%'),
+                         '/here is 100%')
+
+    def test_interpolate_unicode(self):
+        context = self._makeOne({'here':'/here'})
+        result = context.interpolate(u'\xe9 %(here)s')
+        self.assertEqual(result, '\xc3\xa9 /here')
+        self.assertEqual(type(result), str)
+
+    def test_interpolate_after_context_changed(self):
+        context = self._makeOne({'here':'/here'})
+        self.assertEqual(context.interpolate('%(here)s'), '/here')
+        context['here'] = '/there'
+        self.assertEqual(context.interpolate('%(here)s'), '/there')
+        context.update(here='/elsewhere')
+        self.assertEqual(context.interpolate('%(here)s'), '/elsewhere')
+        del context['here']
+        self.assertRaises(KeyError, context.interpolate, '%(here)s')
+
+    def test_interpolate_after_stack_changed(self):
+        context = self._makeOne()
+        context.stack.append({'here':'/here'})
+        self.assertEqual(context.interpolate('%(here)s'), '/here')
+        context.stack.append({'here':'/there'})
+        self.assertEqual(context.interpolate('%(here)s'), '/there')
+        context.stack.pop()
+        self.assertEqual(context.interpolate('%(here)s'), '/here')
+
+    def test_interpolate_records_names(self):
+        context = self._makeOne({'here':'/here'})
+        context.stack = [{'there':'/there'}]
+        context.interpolated = {}
+        context.interpolate('%(here)s %(there)s and more')
+        context.interpolate('nothing')
+        self.assertEqual(context.interpolated,
+                         {'here':'/here', 'there':'/there'})
+
+    def test_interpolate_records_first_value(self):
+        context = self._makeOne({'here':'/here'})
+        context.interpolated = {}
+        context.interpolate('%(here)s')
+        context['here'] = '/there'
+        self.assertEqual(context.interpolate('%(here)s'), '/there')
+        self.assertEqual(context.interpolated, {'here':'/here'})
+
     def test_action(self):
         context = self._makeOne()
         context.action('declaration', 'callback', discriminator='discriminator')
@@ -63,6 +118,12 @@ class TestContext(unittest.TestCase):
         self.assertEqual(context.discriminators['discriminator'],
                          context.actions[0])
 
+    def test_action_depends(self):
+        context = self._makeOne()
+        context.action('declaration', 'callback', discriminator='b',
+                       depends=['a'])
+        self.assertEqual(context.actions[0].depends, ['a'])
+
     def test_action_no_discriminator_doesnt_conflict(self):
         context = self._makeOne()
         context.action('declaration', 'callback')
@@ -109,6 +170,106 @@ class TestContext(unittest.TestCase):
         self.assertEqual(context.discriminators['discriminator'],
                          context.actions[0])
 
+    def test_action_collect_conflicts(self):
+        context = self._getTargetClass()(_collect_conflicts=True)
+        context.stack = [{'override':False}]
+        context.action('a1', 'callback', discriminator='a')
+        context.action('b1', 'callback', discriminator='b')
+        context.action('a2', 'callback', discriminator='a')
+        context.action('a3', 'callback', discriminator='a')
+        context.action('b2', 'callback', discriminator='b')
+        context.action('a4', 'callback', discriminator='a', override=True)
+        context.action('a5', 'callback', discriminator='a')
+        self.assertEqual(context.conflicts,
+                         [['a1', 'a2', 'a3'], ['b1', 'b2'], ['a4', 'a5']])
+        self.assertEqual([ action.declaration for action in context.actions ],
+                         ['a1', 'b1', 'a4'])
+        self.assertEqual(context.discriminators['a'].declaration, 'a4')
+
+    def test_check_conflicts(self):
+        from repoze.configuration.exceptions import ConfigurationConflicts
+        context = self._makeOne()
+        context.check_conflicts()
+        context.conflicts = [['a1', 'a2']]
+        try:
+            context.check_conflicts()
+        except ConfigurationConflicts, e:
+            self.assertEqual(e.conflicts, [['a1', 'a2']])
+        else:
+            self.fail('ConfigurationConflicts not raised')
+
+    def test_load_collect_conflicts(self):
+        from repoze.configuration.exceptions import ConfigurationConflicts
+        from repoze.configuration.tests import fixtures
+        loaded = []
+        def loader(context, stream):
+            loaded.append(len(context.stack))
+            if len(context.stack) == 1:
+                context.load('another.yml', fixtures)
+            context.action('declaration%d' % len(context.stack), None,
+                           discriminator='a')
+        context = self._getTargetClass()(_loader=loader,
+                                         _collect_conflicts=True)
+        try:
+            context.load('configure.yml', fixtures)
+        except ConfigurationConflicts, e:
+            self.assertEqual(e.conflicts, [['declaration2', 'declaration1']])
+        else:
+            self.fail('ConfigurationConflicts not raised')
+        self.assertEqual(loaded, [1, 2])
+        self.assertEqual(context.stack, [])
+
+    def test_reload_forgets_conflicts(self):
+        from repoze.configuration.exceptions import ConfigurationConflicts
+        from repoze.configuration.tests import fixtures
+        conflict = [True]
+        def loader(context, stream):
+            context.action('declaration1', None, discriminator='a')
+            if conflict[0]:
+                context.action('declaration2', None, discriminator='a')
+        context = self._getTargetClass()(_loader=loader,
+                                         _cache=DummyCache(),
+                                         _collect_conflicts=True)
+        self.assertRaises(ConfigurationConflicts, context.load,
+                          'configure.yml', fixtures)
+        conflict[0] = False
+        context.reload()
+        self.assertEqual(context.conflicts, [])
+        context.execute()
+
+    def test_reload_without_cache(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        from repoze.configuration.tests import fixtures
+        def loader(context, stream):
+            pass
+        context = self._getTargetClass()(_loader=loader)
+        context.load('configure.yml', fixtures)
+        self.assertRaises(ConfigurationError, context.reload)
+        self.assertEqual(len(context.roots), 1)
+
+    def test_get_directives_default(self):
+        from repoze.configuration.registry import get_registry
+        context = self._makeOne(loader=lambda context, stream: None)
+        self.failUnless(context.get_directives() is get_registry().tags())
+
+    def test_get_directives_loader_registry(self):
+        def loader(context, stream):
+            pass
+        loader.registry = DummyRegistry({'!setting':None})
+        context = self._makeOne(loader=loader)
+        self.assertEqual(context.get_directives(), {'!setting':None})
+        other = DummyRegistry({'!other':None})
+        self.assertEqual(context.get_directives(other.loader),
+                         {'!other':None})
+
+    def test_get_directives_overridden(self):
+        def loader(context, stream):
+            pass
+        loader.registry = DummyRegistry({'!setting':None})
+        context = self._makeOne(loader=loader)
+        context.directives = {'!other':None}
+        self.assertEqual(context.get_directives(), {'!other':None})
+
     def test_resolve_absolute(self):
         from repoze.configuration.tests.fixtures import fixturefunc
         context = self._makeOne()
@@ -144,6 +305,25 @@ class TestContext(unittest.TestCase):
         result = context.resolve('.')
         self.assertEqual(result, tests)
         
+    def test_resolve_cached(self):
+        from repoze.configuration.tests import fixtures
+        context = self._makeOne()
+        context.stack.append({'package':fixtures})
+        context.resolve(':fixturefunc')
+        context.resolve('repoze.configuration.tests.fixtures:fixturefunc')
+        self.assertEqual(context.resolver.hits, 1)
+        self.assertEqual(context.resolver.misses, 1)
+
+    def test_resolve_shared_resolver(self):
+        from repoze.configuration.resolver import Resolver
+        resolver = Resolver()
+        context1 = self._getTargetClass()(_resolver=resolver)
+        context2 = self._getTargetClass()(_resolver=resolver)
+        context1.resolve('repoze.configuration')
+        context2.resolve('repoze.configuration')
+        self.failUnless(context1.resolver is context2.resolver)
+        self.assertEqual(resolver.hits, 1)
+
     def test_resolve_relative_nocurrentpackage(self):
         context = self._makeOne()
         self.assertRaises(ImportError, context.resolve, '.fixturefunc')
@@ -237,6 +417,45 @@ class TestContext(unittest.TestCase):
         filename = os.path.join(fixtures, '__init__.py')
         self.assertEqual(context.abs_filename('__init__.py'), filename)
 
+    def test_stream_unnamed_resource(self):
+        from repoze.configuration import context as module
+        from repoze.configuration.tests import fixtures
+        saved = module.pkg_resources
+        module.pkg_resources = DummyResources('--- !foo\n')
+        try:
+            context = self._makeOne()
+            stream = context.stream('configure.yml', fixtures)
+        finally:
+            module.pkg_resources = saved
+        name = 'repoze.configuration.tests.fixtures:configure.yml'
+        self.assertEqual(stream.name, name)
+        self.assertEqual(stream.read(), '--- !foo\n')
+        self.assertEqual(context.sources.text(name), '--- !foo\n')
+
+    def test_stream_closes_resource(self):
+        from repoze.configuration import context as module
+        from repoze.configuration.tests import fixtures
+        saved = module.pkg_resources
+        resources = module.pkg_resources = DummyResources('--- !foo\n')
+        try:
+            context = self._makeOne()
+            stream = context.stream('configure.yml', fixtures)
+        finally:
+            module.pkg_resources = saved
+        self.assertEqual(resources.stream.closed, True)
+        self.assertEqual(stream.read(), '--- !foo\n')
+
+    def test_stream_named_not_registered(self):
+        import os
+        from repoze.configuration.tests import fixtures
+        filename = os.path.join(os.path.dirname(
+            os.path.abspath(fixtures.__file__)), 'configure.yml')
+        context = self._makeOne()
+        stream = context.stream(filename)
+        self.assertEqual(stream.name, filename)
+        self.assertEqual(stream.read(), open(filename).read())
+        self.assertEqual(context.sources.texts, {})
+
     def test_load_standard_loader(self):
         def loader(context, stream):
             context.loaded = True
@@ -280,6 +499,87 @@ class TestContext(unittest.TestCase):
         context.execute()
         self.assertEqual([action.executed for action in actions], [True, True])
 
+    def test_execute_with_conflicts(self):
+        from repoze.configuration.exceptions import ConfigurationConflicts
+        context = self._makeOne()
+        actions = [ DummyAction() ]
+        context.actions = actions
+        context.conflicts = [['a1', 'a2']]
+        self.assertRaises(ConfigurationConflicts, context.execute)
+        self.assertEqual(actions[0].executed, False)
+
+    def test_execute_workers(self):
+        context = self._makeOne()
+        actions = [ DummyAction(), DummyAction()]
+        for action in actions:
+            action.discriminator = None
+            action.depends = ()
+        context.actions = actions
+        context.execute(workers=2)
+        self.assertEqual([action.executed for action in actions], [True, True])
+
+class TestContextIterload(TempdirMixin, unittest.TestCase):
+    def _makeContext(self, called):
+        from repoze.configuration.context import Context
+        from repoze.configuration.tests.helpers import make_loader
+        def setting(declaration):
+            called.append(declaration)
+        return Context(_loader=make_loader(setting=setting))
+
+    def test_iterload(self):
+        root = self._writeFile(
+            'root.yml',
+            '--- !setting\nname: a\nvalue: "%(here)s"\n'
+            '--- !include\nfilename: "%(here)s/child.yml"\n'
+            '--- !setting\nname: c\n')
+        child = self._writeFile('child.yml', '--- !setting\nname: b\n')
+        called = []
+        context = self._makeContext(called)
+        items = context.iterload(root, None)
+        tag, structure, span, depth = items.next()
+        self.assertEqual(tag, '!setting')
+        self.assertEqual(structure, {'name':'a', 'value':self.tempdir})
+        self.assertEqual(span[0], root)
+        self.assertEqual(span[3], 0)
+        self.assertEqual(depth, 0)
+        self.assertEqual(len(context.stack), 1)
+        rest = [ (item[0], item[1].get('name'), item[2][0], item[3])
+                 for item in items ]
+        self.assertEqual(rest, [('!include', None, root, 0),
+                                ('!setting', 'b', child, 1),
+                                ('!setting', 'c', root, 0)])
+        self.assertEqual(called, [])
+        self.assertEqual(context.actions, [])
+        self.assertEqual(context.stack, [])
+
+    def test_iterload_abandoned(self):
+        root = self._writeFile(
+            'root.yml', '--- !include\nfilename: "%(here)s/child.yml"\n')
+        self._writeFile('child.yml',
+                        '--- !setting\nname: b\n--- !setting\nname: c\n')
+        context = self._makeContext([])
+        items = context.iterload(root, None)
+        items.next()
+        items.next()
+        self.assertEqual(len(context.stack), 2)
+        items.close()
+        self.assertEqual(context.stack, [])
+
+    def test_iterload_unnamed_resource_not_registered(self):
+        from repoze.configuration import context as module
+        from repoze.configuration.tests import fixtures
+        saved = module.pkg_resources
+        module.pkg_resources = DummyResources('--- !setting\nname: a\n')
+        try:
+            context = self._makeContext([])
+            items = list(context.iterload('configure.yml', fixtures))
+        finally:
+            module.pkg_resources = saved
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0][2][0],
+                         'repoze.configuration.tests.fixtures:configure.yml')
+        self.assertEqual(context.sources.texts, {})
+
 class TestAction(unittest.TestCase):
     def _getTargetClass(self):
         from repoze.configuration.context import Action
@@ -294,6 +594,11 @@ class TestAction(unittest.TestCase):
         self.assertEqual(action.callback, 'callback')
         self.assertEqual(action.declaration, 'declaration')
 
+    def test_slots(self):
+        action = self._makeOne('discriminator', 'callback', 'declaration')
+        self.failIf(hasattr(action, '__dict__'))
+        self.assertEqual(action.depends, None)
+
     def test_execute(self):
         class Callback:
             def __call__(self):
@@ -312,6 +617,21 @@ class TestAction(unittest.TestCase):
         action = self._makeOne('discriminator', callback, declaration)
         self.assertRaises(ValueError, action.execute)
 
+class DummyRegistry:
+    def __init__(self, tags):
+        self._tags = tags
+        def loader(context, stream):
+            pass
+        loader.registry = self
+        self.loader = loader
+
+    def tags(self):
+        return self._tags
+
+class DummyCache:
+    def lookup(self, context, filename, frame):
+        return None
+
 class DummyAction:
     executed = False
     def __init__(self):
@@ -323,3 +643,15 @@ class DummyAction:
 class DummyDeclaration:
     lineinfo = 'lineinfo'
     
+
+class DummyResources:
+    def __init__(self, text):
+        self.text = text
+
+    def resource_stream(self, package_name, filename):
+        import StringIO
+        self.stream = StringIO.StringIO(self.text)
+        return self.stream
+
+    def resource_filename(self, package_name, filename):
+        return '/%s/%s' % (package_name, filename)
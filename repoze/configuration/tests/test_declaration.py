@@ -172,6 +172,15 @@ class TestDeclaration(unittest.TestCase):
         self.assertEqual(context.actions,
                          [(decl, 'callback', 'discriminator', 'override')])
 
+    def test_action_depends(self):
+        context = DummyContext({})
+        decl = self._makeOne(context=context)
+        decl.action('callback', discriminator='discriminator',
+                    depends=['other'])
+        self.assertEqual(context.actions,
+                         [(decl, 'callback', 'discriminator', False,
+                           ['other'])])
+
 class TestYAMLDeclaration(unittest.TestCase):
     def _getTargetClass(self):
         from repoze.configuration.declaration import YAMLDeclaration
@@ -188,6 +197,41 @@ class TestYAMLDeclaration(unittest.TestCase):
         line = decl.lineinfo
         self.assertEqual(line, 'lines 2-2 of file "dummy"')
 
+    def test_detach(self):
+        context = DummyContext()
+        loader = DummyLoader(context)
+        node = DummyNode(id='deep')
+        decl = self._makeOne(context, loader, node)
+        lineinfo = decl.lineinfo
+        self.assertEqual(decl.structure, 'deep')
+        decl.detach()
+        self.assertEqual(decl._loader, None)
+        self.assertEqual(decl._node, None)
+        self.assertEqual(decl.structure, 'deep')
+        self.assertEqual(decl.span, ('dummy', 0, 0, 1, 1))
+        self.assertEqual(decl.lineinfo, lineinfo)
+        decl.detach() # idempotent
+        self.assertEqual(decl.span, ('dummy', 0, 0, 1, 1))
+
+    def test_detach_keeps_structure_set(self):
+        context = DummyContext()
+        loader = DummyLoader(context)
+        decl = self._makeOne(context, loader, DummyNode(id='deep'))
+        decl.structure = 'structure'
+        decl.detach()
+        self.assertEqual(decl.structure, 'structure')
+
+    def test_detach_unread_structure(self):
+        from repoze.configuration.declaration import _marker
+        from repoze.configuration.exceptions import ConfigurationError
+        context = DummyContext()
+        loader = DummyLoader(context)
+        decl = self._makeOne(context, loader, DummyNode(id='deep'))
+        decl.detach()
+        self.assertTrue(decl._structure is _marker)
+        self.assertEqual(decl.span, ('dummy', 0, 0, 1, 1))
+        self.assertRaises(ConfigurationError, getattr, decl, 'structure')
+
     def test_get_structure_deep(self):
         context = DummyContext()
         loader = DummyLoader(context)
@@ -295,6 +339,7 @@ class DummyMark:
     line = 1
     column = 1
     name = 'dummy'
+    index = 0
 
 class DummyContext:
     def __init__(self, registry=None, resolve_err=False):
@@ -309,8 +354,13 @@ class DummyContext:
             raise ImportError('whatever')
         return 'resolved'
 
-    def action(self, directive, callback, discriminator=None, override=False):
-        self.actions.append((directive, callback, discriminator, override))
+    def action(self, directive, callback, discriminator=None, override=False,
+               depends=None):
+        if depends is None:
+            self.actions.append((directive, callback, discriminator, override))
+        else:
+            self.actions.append((directive, callback, discriminator, override,
+                                 depends))
 
 
 class DummyLoader:
@@ -0,0 +1,61 @@
+import unittest
+
+class TestActionDelta(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.delta import ActionDelta
+        return ActionDelta
+
+    def _makeOne(self, old, new):
+        return self._getTargetClass()(old, new)
+
+    def test_empty(self):
+        delta = self._makeOne([], [])
+        self.assertEqual(delta.added, [])
+        self.assertEqual(delta.removed, [])
+        self.assertEqual(delta.changed, [])
+        self.failIf(delta)
+
+    def test_by_discriminator(self):
+        a1 = DummyAction('a', {'x':1})
+        b1 = DummyAction('b', {'x':1})
+        a2 = DummyAction('a', {'x':1})
+        b2 = DummyAction('b', {'x':2})
+        c2 = DummyAction('c', {'x':1})
+        delta = self._makeOne([a1, b1], [c2, a2, b2])
+        self.assertEqual(delta.added, [c2])
+        self.assertEqual(delta.removed, [])
+        self.assertEqual(delta.changed, [(b1, b2)])
+        self.failUnless(delta)
+
+    def test_moved_to_other_file(self):
+        a1 = DummyAction('a', {}, 'one.yml')
+        a2 = DummyAction('a', {}, 'two.yml')
+        delta = self._makeOne([a1], [a2])
+        self.assertEqual(delta.changed, [(a1, a2)])
+
+    def test_undiscriminated_by_file(self):
+        x1 = DummyAction(None, {'x':1}, 'one.yml')
+        y1 = DummyAction(None, {'y':1}, 'two.yml')
+        z1 = DummyAction(None, {'z':1}, 'two.yml')
+        x2 = DummyAction(None, {'x':1}, 'one.yml')
+        y2 = DummyAction(None, {'y':2}, 'two.yml')
+        delta = self._makeOne([x1, y1, z1], [x2, y2])
+        self.assertEqual(delta.added, [])
+        self.assertEqual(delta.removed, [z1])
+        self.assertEqual(delta.changed, [(y1, y2)])
+
+    def test_no_span(self):
+        a1 = DummyAction(None, {'x':1}, None)
+        a2 = DummyAction(None, {'x':1}, None)
+        self.failIf(self._makeOne([a1], [a2]))
+
+class DummyAction:
+    def __init__(self, discriminator, structure, filename='f.yml'):
+        self.discriminator = discriminator
+        self.declaration = DummyDeclaration(structure, filename)
+
+class DummyDeclaration:
+    def __init__(self, structure, filename):
+        self.structure = structure
+        if filename is not None:
+            self.span = (filename, 0, 1, 0, 0)
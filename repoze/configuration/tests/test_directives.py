@@ -48,6 +48,18 @@ class TestInclude(unittest.TestCase):
         self.assertEqual(declaration.context.loaded,
                          ('here.yml', 'package', True))
 
+class TestIncludeArguments(unittest.TestCase):
+    def _callFUT(self, declaration):
+        from repoze.configuration.directives import include_arguments
+        return include_arguments(declaration)
+
+    def test_it(self):
+        structure = {'filename':'here.yml', 'override':True}
+        declaration = DummyDeclaration(structure=structure)
+        result = self._callFUT(declaration)
+        self.assertEqual(result, ('here.yml', 'package', True))
+        self.assertEqual(declaration.context.loaded, None)
+
 class DummyDeclaration:
     def __init__(self, **kw):
         self.diff = kw.get('diff', False)
@@ -25,7 +25,59 @@ class TestConfigurationConflict(unittest.TestCase):
         self.assertEqual(lines[5], '')
         self.assertEqual(lines[6], 'lineinfo')
 
+    def test_msg_lazy(self):
+        declaration1 = CountingDeclaration()
+        declaration2 = CountingDeclaration()
+        error = self._makeOne(declaration1, declaration2)
+        self.assertEqual(declaration1.calls, 0)
+        self.assertEqual(declaration2.calls, 0)
+        error.msg
+        self.assertEqual(declaration1.calls, 1)
+
+class TestConfigurationConflicts(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.exceptions import ConfigurationConflicts
+        return ConfigurationConflicts
+
+    def test_ctor(self):
+        from repoze.configuration.exceptions import ConfigurationConflict
+        group1 = [Declaration('a1'), Declaration('a2'), Declaration('a3')]
+        group2 = [Declaration('b1'), Declaration('b2')]
+        error = self._getTargetClass()([group1, group2])
+        self.failUnless(isinstance(error, ConfigurationConflict))
+        self.assertEqual(error.conflicts, [group1, group2])
+        self.assertEqual(error.declaration1, group1[1])
+        self.assertEqual(error.declaration2, group1[0])
+        self.assertEqual(error.msg,
+                         'Conflicting declarations (2 groups):\n\n----\n\n'
+                         'a1\n\nconflicts with\n\na2\n\n'
+                         'conflicts with\n\na3\n\n----\n\n'
+                         'b1\n\nconflicts with\n\nb2')
+
+class TestConfigurationExecutionError(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.exceptions import \
+             ConfigurationExecutionError
+        return ConfigurationExecutionError
+
+    def test_msg_lazy(self):
+        declaration = CountingDeclaration()
+        error = self._getTargetClass()(declaration, ValueError('broken'))
+        self.assertEqual(declaration.calls, 0)
+        self.assertEqual(error.msg, 'ValueError: broken\nlineinfo')
+        self.assertEqual(declaration.calls, 1)
 
 class DummyDeclaration(object):
     lineinfo = 'lineinfo'
-    
+
+class Declaration(object):
+    def __init__(self, lineinfo):
+        self.lineinfo = lineinfo
+
+class CountingDeclaration(object):
+    calls = 0
+
+    @property
+    def lineinfo(self):
+        self.calls += 1
+        return 'lineinfo'
@@ -1,5 +1,7 @@
 import unittest
 
+from repoze.configuration.tests.helpers import DummyPoint
+
 class TestImperativeConfig(unittest.TestCase):
     def _getTargetClass(self):
         from repoze.configuration.imperative import ImperativeConfig
@@ -10,7 +12,7 @@ class TestImperativeConfig(unittest.TestCase):
 
     def test_ctor(self):
         directive = DummyDirective()
-        ep = DummyPoint(directive)
+        ep = DummyPoint('point', directive)
         def dummy_iter(group):
             yield ep
 
@@ -20,7 +22,7 @@ class TestImperativeConfig(unittest.TestCase):
 
     def test_import_error(self):
         directive = DummyDirective()
-        ep = DummyPoint(directive, raise_load_exc=True)
+        ep = DummyPoint('point', directive, raise_load_exc=True)
         def dummy_iter(group):
             yield ep
 
@@ -29,7 +31,7 @@ class TestImperativeConfig(unittest.TestCase):
 
     def test_call_directive(self):
         directive = DummyDirective()
-        ep = DummyPoint(directive)
+        ep = DummyPoint('point', directive)
         def dummy_iter(group):
             yield ep
 
@@ -40,7 +42,7 @@ class TestImperativeConfig(unittest.TestCase):
 
     def test_ambiguous_directive(self):
         directive = DummyDirective()
-        ep = DummyPoint(directive)
+        ep = DummyPoint('point', directive)
         def dummy_iter(group):
             yield ep
             yield ep
@@ -48,18 +50,66 @@ class TestImperativeConfig(unittest.TestCase):
         config = self._makeOne(object(), dummy_iter)
         self.assertRaises(AttributeError, config.point)
 
-class DummyPoint:
-    name = 'point'
-    def __init__(self, directive, raise_load_exc=False):
-        self.directive = directive
-        self.raise_load_exc = raise_load_exc
+    def test_lazy_directive_loaded_when_called(self):
+        directive = DummyDirective()
+        ep = DummyPoint('point', directive, module_name='not.imported.yet')
+        def dummy_iter(group):
+            yield ep
+
+        config = self._makeOne(object(), dummy_iter)
+        self.assertEqual(ep.loads, 0)
+        config.point(foo='foo')
+        config.point(foo='bar')
+        self.assertEqual(ep.loads, 1)
+        self.assertEqual(directive.declaration.structure, {'foo': 'bar'})
+
+    def test_directive_cached(self):
+        directive = DummyDirective()
+        ep = DummyPoint('point', directive)
+        def dummy_iter(group):
+            yield ep
+
+        config = self._makeOne(object(), dummy_iter)
+        wrapper = config.point
+        self.failUnless(config.__dict__['point'] is wrapper)
+        self.failUnless(config.point is wrapper)
+
+    def test_apply(self):
+        directive = RecordingDirective()
+        ep = DummyPoint('point', directive, module_name='not.imported.yet')
+        def dummy_iter(group):
+            yield ep
+
+        config = self._makeOne(object(), dummy_iter)
+        kw = {'foo': 'bar'}
+        config.apply([('point', {'foo': 'foo'}), ('point', kw)])
+        self.assertEqual([ declaration.structure
+                           for declaration in directive.declarations ],
+                         [{'foo': 'foo'}, {'foo': 'bar'}])
+        self.failIf(directive.declarations[1].structure is kw)
+        self.assertEqual(ep.loads, 1)
 
-    def load(self):
-        if self.raise_load_exc:
-            raise ImportError('foo')
-        return self.directive
+    def test_apply_unknown(self):
+        config = self._makeOne(object(), lambda group: iter(()))
+        self.assertRaises(AttributeError, config.apply, [('point', {})])
+
+    def test_apply_ambiguous(self):
+        directive = DummyDirective()
+        ep = DummyPoint('point', directive)
+        def dummy_iter(group):
+            yield ep
+            yield ep
+
+        config = self._makeOne(object(), dummy_iter)
+        self.assertRaises(AttributeError, config.apply, [('point', {})])
 
 class DummyDirective:
     def __call__(self, declaration):
         self.declaration = declaration
 
+class RecordingDirective:
+    def __init__(self):
+        self.declarations = []
+
+    def __call__(self, declaration):
+        self.declarations.append(declaration)
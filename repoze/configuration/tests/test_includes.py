@@ -0,0 +1,129 @@
+import unittest
+
+from repoze.configuration.tests.helpers import TempdirMixin
+
+class TestIncludeGraph(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.includes import IncludeGraph
+        return IncludeGraph
+
+    def _makeOne(self):
+        return self._getTargetClass()()
+
+    def test_edges_and_counts(self):
+        graph = self._makeOne()
+        graph.enter('/a', False)
+        graph.enter('/b', False)
+        graph.enter('/shared', False)
+        graph.exit()
+        graph.exit()
+        graph.enter('/c', False)
+        graph.record('/shared')
+        graph.record('/shared')
+        graph.exit()
+        graph.exit()
+        self.assertEqual(graph.chain, [])
+        self.assertEqual(graph.edges, {'/a':['/b', '/c'], '/b':['/shared'],
+                                       '/c':['/shared'], '/shared':[]})
+        self.assertEqual(graph.counts, {'/a':1, '/b':1, '/c':1, '/shared':3})
+        self.assertEqual(graph.includers('/shared'), ['/b', '/c'])
+        self.assertEqual(graph.fan_in(),
+                         {'/a':0, '/b':1, '/c':1, '/shared':2})
+
+    def test_cycle(self):
+        from repoze.configuration.exceptions import ConfigurationIncludeCycle
+        graph = self._makeOne()
+        graph.enter('/a', False)
+        graph.enter('/b', False)
+        try:
+            graph.enter('/a', False)
+        except ConfigurationIncludeCycle, e:
+            self.assertEqual(e.chain, ['/a', '/b', '/a'])
+            self.assertEqual(str(e),
+                             'Circular include:\n\n/a\n  includes /b\n'
+                             '  includes /a')
+        else:
+            self.fail('ConfigurationIncludeCycle not raised')
+        self.assertEqual(graph.chain, ['/a', '/b'])
+
+    def test_is_duplicate(self):
+        graph = self._makeOne()
+        self.failIf(graph.is_duplicate('/a', False))
+        graph.enter('/a', False)
+        self.failIf(graph.is_duplicate('/a', False)) # a cycle
+        graph.enter('/b', False)
+        graph.exit()
+        self.failUnless(graph.is_duplicate('/b', False))
+        self.failIf(graph.is_duplicate('/b', True))
+        graph.exit()
+        self.failIf(graph.is_duplicate('/b', False)) # top level
+
+class TestContextIncludes(TempdirMixin, unittest.TestCase):
+    def _writeFile(self, name, text):
+        import os
+        return os.path.realpath(TempdirMixin._writeFile(self, name, text))
+
+    def _makeContext(self, include_once=False):
+        from repoze.configuration.context import Context
+        from repoze.configuration.tests.helpers import make_loader
+        def setting(declaration):
+            declaration.action(None)
+        return Context(_loader=make_loader(setting=setting),
+                       _include_once=include_once)
+
+    def _writeDiamond(self):
+        root = self._writeFile(
+            'root.yml', '--- !include\nfilename: "%(here)s/a.yml"\n'
+            '--- !include\nfilename: "%(here)s/b.yml"\n')
+        self._writeFile('a.yml',
+                        '--- !include\nfilename: "%(here)s/shared.yml"\n')
+        self._writeFile('b.yml',
+                        '--- !include\nfilename: "%(here)s/shared.yml"\n')
+        shared = self._writeFile('shared.yml', '--- !setting {}\n')
+        return root, shared
+
+    def test_shared_loaded_twice(self):
+        root, shared = self._writeDiamond()
+        context = self._makeContext()
+        context.load(root, None)
+        self.assertEqual(len(context.actions), 2)
+        self.assertEqual(context.includes.counts[shared], 2)
+        self.assertEqual(context.includes.fan_in()[shared], 2)
+
+    def test_include_once(self):
+        root, shared = self._writeDiamond()
+        context = self._makeContext(include_once=True)
+        context.load(root, None)
+        self.assertEqual(len(context.actions), 1)
+        self.assertEqual(context.includes.counts[shared], 2)
+        self.assertEqual(context.includes.fan_in()[shared], 2)
+
+    def test_include_once_iterload(self):
+        root, shared = self._writeDiamond()
+        context = self._makeContext(include_once=True)
+        tags = [ item[0] for item in context.iterload(root, None) ]
+        self.assertEqual(tags, ['!include', '!include', '!setting',
+                                '!include', '!include'])
+
+    def test_cycle(self):
+        from repoze.configuration.exceptions import ConfigurationIncludeCycle
+        root = self._writeFile(
+            'root.yml', '--- !include\nfilename: "%(here)s/a.yml"\n')
+        a = self._writeFile(
+            'a.yml', '--- !include\nfilename: "%(here)s/b.yml"\n')
+        b = self._writeFile(
+            'b.yml', '--- !include\nfilename: "%(here)s/a.yml"\n')
+        for include_once in (False, True):
+            context = self._makeContext(include_once)
+            try:
+                context.load(root, None)
+            except ConfigurationIncludeCycle, e:
+                self.assertEqual(e.chain, [root, a, b, a])
+            else:
+                self.fail('ConfigurationIncludeCycle not raised')
+            self.assertEqual(context.stack, [])
+            self.assertEqual(context.includes.chain, [])
+            context = self._makeContext(include_once)
+            self.assertRaises(ConfigurationIncludeCycle, list,
+                              context.iterload(root, None))
+            self.assertEqual(context.includes.chain, [])
@@ -0,0 +1,105 @@
+import unittest
+
+from repoze.configuration.tests.helpers import TempdirMixin
+
+class TestLoadInstrument(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.instrument import LoadInstrument
+        return LoadInstrument
+
+    def _makeOne(self):
+        instrument = self._getTargetClass()()
+        ticks = iter(range(100))
+        instrument.timer = lambda: float(ticks.next())
+        return instrument
+
+    def test_empty_report(self):
+        instrument = self._makeOne()
+        self.assertEqual(instrument.report(),
+                         {'files':[], 'directives':{}, 'actions':0})
+
+    def test_report(self):
+        instrument = self._makeOne()
+        def directive(declaration):
+            instrument.action_registered(None)
+        instrument.enter_file('/root.yml')             # t=0
+        instrument.call_directive('!a', directive, None) # t=1..2
+        instrument.enter_file('/child.yml')            # t=3
+        instrument.call_directive('!a', directive, None) # t=4..5
+        instrument.call_directive('!b', directive, None) # t=6..7
+        instrument.exit_file()                         # t=8
+        instrument.exit_file()                         # t=9
+        report = instrument.report()
+        self.assertEqual(report['actions'], 3)
+        self.assertEqual(report['directives'],
+                         {'!a':{'count':2, 'time':2.0},
+                          '!b':{'count':1, 'time':1.0}})
+        root = report['files'][0]
+        self.assertEqual(root['filename'], '/root.yml')
+        self.assertEqual(root['depth'], 0)
+        self.assertEqual(root['time'], 9.0)
+        self.assertEqual(root['self_time'], 4.0)
+        self.assertEqual(root['directives'], 1)
+        self.assertEqual(root['cumulative_directives'], 3)
+        self.assertEqual(root['actions'], 1)
+        self.assertEqual(root['cumulative_actions'], 3)
+        child = root['includes'][0]
+        self.assertEqual(child['filename'], '/child.yml')
+        self.assertEqual(child['depth'], 1)
+        self.assertEqual(child['time'], 5.0)
+        self.assertEqual(child['self_time'], 5.0)
+        self.assertEqual(child['includes'], [])
+
+    def test_call_directive_raises(self):
+        instrument = self._makeOne()
+        def directive(declaration):
+            raise ValueError
+        self.assertRaises(ValueError, instrument.call_directive, '!a',
+                          directive, None)
+        self.assertEqual(instrument.report()['directives'],
+                         {'!a':{'count':1, 'time':1.0}})
+
+class TestInstrumentedLoad(TempdirMixin, unittest.TestCase):
+    def _load(self, root, cache=None):
+        from repoze.configuration.context import Context
+        from repoze.configuration.instrument import LoadInstrument
+        from repoze.configuration.tests.helpers import make_loader
+        def setting(declaration):
+            declaration.action(None)
+        instrument = LoadInstrument()
+        context = Context(_loader=make_loader(setting=setting),
+                          _cache=cache, _instrument=instrument)
+        context.load(root, None)
+        return instrument.report()
+
+    def _checkReport(self, report, root, child):
+        self.assertEqual(report['actions'], 3)
+        self.assertEqual(report['directives']['!setting']['count'], 3)
+        self.assertEqual(report['directives']['!include']['count'], 1)
+        [files] = report['files']
+        self.assertEqual(files['filename'], root)
+        self.assertEqual(files['directives'], 2)
+        self.assertEqual(files['cumulative_actions'], 3)
+        [included] = files['includes']
+        self.assertEqual(included['filename'], child)
+        self.assertEqual(included['depth'], 1)
+        self.assertEqual(included['actions'], 2)
+
+    def test_load(self):
+        root = self._writeFile(
+            'root.yml', '--- !setting {}\n'
+            '--- !include\nfilename: "%(here)s/child.yml"\n')
+        child = self._writeFile('child.yml',
+                                '--- !setting {}\n--- !setting {}\n')
+        self._checkReport(self._load(root), root, child)
+
+    def test_load_replayed(self):
+        from repoze.configuration.cache import MemoryParseCache
+        root = self._writeFile(
+            'root.yml', '--- !setting {}\n'
+            '--- !include\nfilename: "%(here)s/child.yml"\n')
+        child = self._writeFile('child.yml',
+                                '--- !setting {}\n--- !setting {}\n')
+        cache = MemoryParseCache()
+        self._load(root, cache)
+        self._checkReport(self._load(root, cache), root, child)
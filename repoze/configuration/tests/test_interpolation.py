@@ -0,0 +1,48 @@
+import unittest
+
+class Test_compile_template(unittest.TestCase):
+    def _callFUT(self, value):
+        from repoze.configuration.interpolation import compile_template
+        return compile_template(value)
+
+    def test_literal(self):
+        template = self._callFUT(u'no markers here')
+        self.assertEqual(template.names, None)
+        self.assertEqual(template.literal, 'no markers here')
+        self.assertEqual(type(template.literal), str)
+        self.assertEqual(template.render({}), 'no markers here')
+
+    def test_unterminated_marker(self):
+        template = self._callFUT('Here is %(here')
+        self.assertEqual(template.names, None)
+        self.assertEqual(template.literal, 'Here is %(here')
+
+    def test_markers(self):
+        template = self._callFUT('%(a)s is 50% of %(b)s')
+        self.assertEqual(template.names, ('a', 'b'))
+        self.assertEqual(template.format, '%s is 50%% of %s')
+        self.assertEqual(template.render({'a':'1', 'b':'2'}), '1 is 50% of 2')
+
+    def test_render_missing_name(self):
+        template = self._callFUT('%(a)s %(b)s')
+        try:
+            template.render({'a':'1'})
+        except KeyError, e:
+            self.assertEqual(e.args[0], 'b')
+        else:
+            self.fail('KeyError not raised')
+
+    def test_cached(self):
+        template = self._callFUT('cached %(a)s')
+        self.failUnless(self._callFUT('cached %(a)s') is template)
+
+    def test_cache_emptied_when_full(self):
+        from repoze.configuration import interpolation
+        saved = interpolation.MAX_TEMPLATES
+        interpolation.MAX_TEMPLATES = 0
+        try:
+            self._callFUT('one')
+            self._callFUT('two')
+            self.assertEqual(interpolation._templates.keys(), ['two'])
+        finally:
+            interpolation.MAX_TEMPLATES = saved
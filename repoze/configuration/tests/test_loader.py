@@ -64,6 +64,42 @@ class TestYAMLPluginLoader(unittest.TestCase):
         self.assertEqual(loader.yaml_constructors['tag:point'].wrapped,
                          directive)
 
+    def test_ctor_class_constructors_not_mutated(self):
+        import StringIO
+        from yaml import SafeLoader
+        klass = self._getTargetClass()
+        before = SafeLoader.yaml_constructors.copy()
+        def directive(context, structure): return 'success'
+        point = DummyPoint(directive)
+        def iter_entry_points(group, suffix=None):
+            yield point
+        context = DummyContext()
+        loader = self._makeOne(context, StringIO.StringIO(), iter_entry_points)
+        self.failIf('!point' in klass.yaml_constructors)
+        self.assertEqual(SafeLoader.yaml_constructors, before)
+        self.failUnless('!point' in loader.yaml_constructors)
+
+    def test_ctor_default_registry_table_shared(self):
+        import StringIO
+        context = DummyContext()
+        loader1 = self._makeOne(context, StringIO.StringIO(), None)
+        loader2 = self._makeOne(context, StringIO.StringIO(), None)
+        self.failUnless(loader1.yaml_constructors is loader2.yaml_constructors)
+        self.failUnless('!include' in loader1.yaml_constructors)
+
+    def test_ctor_class_registry(self):
+        import StringIO
+        from repoze.configuration.registry import DirectiveRegistry
+        def directive(context, structure): return 'success'
+        point = DummyPoint(directive)
+        def iter_entry_points(group, suffix=None):
+            yield point
+        class Loader(self._getTargetClass()):
+            registry = DirectiveRegistry(iter_entry_points)
+        loader = Loader(DummyContext(), StringIO.StringIO())
+        self.failUnless(loader.registry is Loader.registry)
+        self.failUnless('!point' in loader.yaml_constructors)
+
     def test_interpolate_str(self):
         from yaml.nodes import ScalarNode
         import StringIO
@@ -86,6 +122,68 @@ class TestYAMLPluginLoader(unittest.TestCase):
         self.assertRaises(ConfigurationError,
                           loader.interpolate_str, loader, node)
 
+    def test_directive_lineinfo(self):
+        import StringIO
+        stream = StringIO.StringIO('--- !point\na: "%(x)s"\n')
+        stream.name = 'config.yml'
+        directive = DummyDirective(read=True)
+        point = DummyPoint(directive)
+        def iter_entry_points(group, suffix=None):
+            yield point
+        context = DummyContext()
+        self._makeOne(context, stream, iter_entry_points)
+        declaration = directive.declaration
+        self.assertEqual(declaration.structure, {'a':'%(x)s'})
+        self.assertEqual(declaration.lineinfo,
+                         'lines 1-3 of file "config.yml"')
+
+    def test_loader_released(self):
+        import gc
+        import StringIO
+        import weakref
+        stream = StringIO.StringIO('--- !point\na: [1, 2]\n')
+        stream.name = 'config.yml'
+        directive = DummyDirective(read=True)
+        point = DummyPoint(directive)
+        def iter_entry_points(group, suffix=None):
+            yield point
+        context = DummyContext()
+        loader = self._makeOne(context, stream, iter_entry_points)
+        ref = weakref.ref(loader)
+        del loader
+        gc.collect()
+        self.assertEqual(ref(), None)
+        # the declaration kept by the directive still works
+        declaration = directive.declaration
+        self.assertEqual(declaration.structure, {'a':[1, 2]})
+        self.assertEqual(declaration.span, ('config.yml', 4, 21, 0, 2))
+        self.assertEqual(declaration.lineinfo,
+                         'lines 1-3 of file "config.yml"')
+
+    def test_unread_structure_not_constructed(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        import StringIO
+        stream = StringIO.StringIO('--- !point\na: "%(missing)s"\n')
+        stream.name = 'config.yml'
+        directive = DummyDirective()
+        point = DummyPoint(directive)
+        def iter_entry_points(group, suffix=None):
+            yield point
+        context = DummyContext(interpolation_exc=True)
+        self._makeOne(context, stream, iter_entry_points)
+        declaration = directive.declaration
+        self.assertEqual(declaration.span, ('config.yml', 4, 28, 0, 2))
+        self.assertRaises(ConfigurationError, getattr, declaration,
+                          'structure')
+
+from repoze.configuration.loader import CYAMLPluginLoader
+
+if CYAMLPluginLoader is not None:
+    class TestCYAMLPluginLoader(TestYAMLPluginLoader):
+        def _getTargetClass(self):
+            from repoze.configuration.loader import CYAMLPluginLoader
+            return CYAMLPluginLoader
+
 class Test_wrap_directive(unittest.TestCase):
     def _callFUT(self, directive):
         from repoze.configuration.loader import wrap_directive
@@ -139,8 +237,14 @@ class DummyMark:
     line = 1
     column = 1
     name = 'dummy'
+    index = 0
     
 class DummyDirective:
+    def __init__(self, read=False):
+        self.read = read
+
     def __call__(self, declaration):
         self.declaration = declaration
+        if self.read:
+            declaration.structure
         
@@ -0,0 +1,259 @@
+import unittest
+
+from repoze.configuration.tests.helpers import TempdirMixin
+from repoze.configuration.tests.helpers import make_loader
+
+class TestParallelParser(TempdirMixin, unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.parallel import ParallelParser
+        return ParallelParser
+
+    def _makeOne(self, cache=None):
+        return self._getTargetClass()(2, cache)
+
+    def _writeTree(self, count=4, conflict=False):
+        root = []
+        for i in range(count):
+            root.append('--- !setting\nname: root%d\n' % i)
+            root.append('--- !include\nfilename: "%%(here)s/child%d.yml"\n' % i)
+            name = 'child%d' % i
+            if conflict:
+                name = 'child'
+            self._writeFile('child%d.yml' % i,
+                            '--- !setting\nname: %s\n'
+                            '--- !include\nfilename: "%%(here)s/leaf.yml"\n'
+                            % name)
+        self._writeFile('leaf.yml', '--- !setting {}\n')
+        return self._writeFile('root.yml', ''.join(root))
+
+    def _makeContext(self, cache):
+        from repoze.configuration.context import Context
+        return Context(_loader=loader, _cache=cache)
+
+    def _actions(self, context):
+        return [ (action.discriminator, action.declaration.lineinfo)
+                 for action in context.actions ]
+
+    def test_same_actions_as_serial(self):
+        root = self._writeTree()
+        serial = self._makeContext(None)
+        serial.load(root, None)
+        parser = self._makeOne()
+        context = self._makeContext(parser)
+        try:
+            context.load(root, None)
+            self.failIf(parser.pool is None)
+        finally:
+            parser.close()
+        self.assertEqual(len(context.actions), 12)
+        self.assertEqual(self._actions(context), self._actions(serial))
+        self.assertEqual(sorted(context.discriminators.keys()),
+                         sorted(serial.discriminators.keys()))
+
+    def test_conflict_as_serial(self):
+        from repoze.configuration.exceptions import ConfigurationConflict
+        root = self._writeTree(conflict=True)
+        serial = self._makeContext(None)
+        try:
+            serial.load(root, None)
+        except ConfigurationConflict, e:
+            expected = str(e)
+        parser = self._makeOne()
+        context = self._makeContext(parser)
+        try:
+            try:
+                context.load(root, None)
+            except ConfigurationConflict, e:
+                self.assertEqual(str(e), expected)
+            else:
+                self.fail('ConfigurationConflict not raised')
+        finally:
+            parser.close()
+
+    def test_directive_defines_name_interpolated_later(self):
+        self._writeFile('child.yml',
+                        '--- !define {name: y, value: there}\n'
+                        '--- !setting {name: "%(y)s"}\n')
+        root = self._writeFile('root.yml',
+                               '--- !define {name: x, value: hello}\n'
+                               '--- !setting {name: "%(x)s"}\n'
+                               '--- !include\nfilename: "%(here)s/child.yml"\n'
+                               '--- !setting {name: "%(x)s %(y)s"}\n')
+        serial = self._makeContext(None)
+        serial.load(root, None)
+        parser = self._makeOne()
+        context = self._makeContext(parser)
+        try:
+            context.load(root, None)
+        finally:
+            parser.close()
+        discriminators = [ a.discriminator for a in context.actions ]
+        self.assertEqual(discriminators, ['hello', 'there', 'hello there'])
+        self.assertEqual(self._actions(context), self._actions(serial))
+
+    def test_included_file_redefines_name(self):
+        self._writeFile('child.yml',
+                        '--- !define {name: x, value: b}\n'
+                        '--- !setting {name: "%(x)s"}\n')
+        root = self._writeFile(
+            'root.yml', '--- !include\nfilename: "%(here)s/child.yml"\n')
+        serial = self._makeContext(None)
+        serial['x'] = 'a'
+        serial.load(root, None)
+        parser = self._makeOne()
+        context = self._makeContext(parser)
+        context['x'] = 'a'
+        try:
+            context.load(root, None)
+            self.failIf(parser.pool is None)
+        finally:
+            parser.close()
+        discriminators = [ a.discriminator for a in context.actions ]
+        self.assertEqual(discriminators, ['b'])
+        self.assertEqual(self._actions(context), self._actions(serial))
+
+    def test_interpolation_error_as_serial(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        self._writeFile('child.yml', '--- !setting {name: "%(missing)s"}\n')
+        root = self._writeFile(
+            'root.yml', '--- !include\nfilename: "%(here)s/child.yml"\n')
+        parser = self._makeOne()
+        context = self._makeContext(parser)
+        try:
+            self.assertRaises(ConfigurationError, context.load, root, None)
+        finally:
+            parser.close()
+
+    def test_file_parsed_once(self):
+        root = self._writeTree()
+        parser = self._makeOne()
+        context = self._makeContext(parser)
+        del parsed[:]
+        try:
+            context.load(root, None)
+        finally:
+            parser.close()
+        self.assertEqual(parsed.count(root), 1)
+
+    def test_conflict_before_late_parse_error(self):
+        from repoze.configuration.exceptions import ConfigurationConflict
+        root = self._writeFile('root.yml',
+                               '--- !setting {name: a}\n'
+                               '--- !setting {name: a}\n'
+                               '--- !setting {name: [unclosed\n')
+        parser = self._makeOne()
+        context = self._makeContext(parser)
+        try:
+            self.assertRaises(ConfigurationConflict, context.load, root, None)
+        finally:
+            parser.close()
+
+    def test_with_parse_cache(self):
+        import os
+        from repoze.configuration.cache import ParseCache
+        root = self._writeTree()
+        cache = ParseCache(os.path.join(self.tempdir, 'cache'))
+        parser = self._makeOne(cache)
+        context = self._makeContext(parser)
+        try:
+            context.load(root, None)
+        finally:
+            parser.close()
+        parser = self._makeOne(cache)
+        warm = self._makeContext(parser)
+        try:
+            warm.load(root, None)
+            # everything came out of the cache: no pool was needed
+            self.assertEqual(parser.pool, None)
+        finally:
+            parser.close()
+        self.assertEqual(self._actions(warm), self._actions(context))
+
+    def test_unpicklable_loader_parses_serially(self):
+        from repoze.configuration.context import Context
+        root = self._writeTree()
+        parser = self._makeOne()
+        def local_loader(context, stream, **kw):
+            return loader(context, stream, **kw)
+        local_loader.registry = loader.registry
+        context = Context(_loader=local_loader, _cache=parser)
+        context.load(root, None)
+        self.assertEqual(parser.pool, None)
+        self.assertEqual(len(context.actions), 12)
+
+class Test_parse(TempdirMixin, unittest.TestCase):
+    def _callFUT(self, *arg):
+        from repoze.configuration.parallel import parse
+        return parse(*arg)
+
+    def test_it(self):
+        import os
+        from repoze.configuration.tests import fixtures
+        fn = os.path.join(os.path.dirname(fixtures.__file__), 'conflict1.yml')
+        frame = {'filename':'conflict1.yml', 'override':False,
+                 'package':'repoze.configuration.tests.fixtures',
+                 'here':os.path.dirname(fn)}
+        declarations = self._callFUT(loader, fn, frame)
+        self.assertEqual(len(declarations), 1)
+        tag, structure, span = declarations[0]
+        self.assertEqual(tag, '!abc')
+        self.assertEqual(structure, {'foo':1})
+        self.assertEqual(span[0], fn)
+
+    def test_interpolation_deferred(self):
+        from repoze.configuration.parallel import Deferred
+        fn = self._writeFile('a.yml', '--- !abc {foo: "%(x)s", bar: b}\n')
+        frame = {'filename':'a.yml', 'override':False, 'package':None,
+                 'here':self.tempdir}
+        declarations = self._callFUT(loader, fn, frame)
+        tag, structure, span = declarations[0]
+        self.assertEqual(structure['bar'], 'b')
+        self.failUnless(isinstance(structure['foo'], Deferred))
+        self.assertEqual(structure['foo'].value, '%(x)s')
+
+    def test_parse_error(self):
+        frame = {'filename':'nonexistent.yml', 'override':False,
+                 'package':None, 'here':'/'}
+        result = self._callFUT(loader, '/nonexistent.yml', frame)
+        self.assertEqual(result, None)
+
+class Test_interpolate_deferred(unittest.TestCase):
+    def _callFUT(self, context, structure):
+        from repoze.configuration.parallel import interpolate_deferred
+        return interpolate_deferred(context, structure)
+
+    def test_it(self):
+        from repoze.configuration.context import Context
+        from repoze.configuration.parallel import Deferred
+        context = Context({'x':'a'})
+        structure = {Deferred('%(x)s'):[Deferred('%(x)s-b'), 1],
+                     'set':set([Deferred('%(x)s')])}
+        result = self._callFUT(context, structure)
+        self.assertEqual(result, {'a':['a-b', 1], 'set':set(['a'])})
+
+    def test_missing_name(self):
+        from repoze.configuration.context import Context
+        from repoze.configuration.parallel import Deferred
+        context = Context()
+        self.assertRaises(KeyError, self._callFUT, context,
+                          [Deferred('%(x)s')])
+
+def setting(declaration):
+    name = declaration.structure.get('name')
+    declaration.action(None, discriminator=name)
+
+def define(declaration):
+    context = declaration.context
+    context[declaration.structure['name']] = declaration.structure['value']
+
+Loader = make_loader(setting=setting, abc=setting, define=define)
+
+# the names of the streams parsed in this process
+parsed = []
+
+def loader(context, stream, **kw):
+    # a module-level function: pickled to the worker processes
+    parsed.append(getattr(stream, 'name', None))
+    return Loader(context, stream, **kw)
+
+loader.registry = Loader.registry
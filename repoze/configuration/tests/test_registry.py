@@ -0,0 +1,125 @@
+import unittest
+
+from repoze.configuration.tests.helpers import DummyPoint
+
+class TestDirectiveRegistry(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.registry import DirectiveRegistry
+        return DirectiveRegistry
+
+    def _makeOne(self, *points):
+        scans = []
+        def iter_entry_points(group):
+            scans.append(group)
+            return iter(points)
+        registry = self._getTargetClass()(iter_entry_points)
+        registry.scans = scans
+        return registry
+
+    def test_points_scanned_once(self):
+        directive = DummyDirective()
+        registry = self._makeOne(DummyPoint('point', directive))
+        self.assertEqual(registry.points(), [('point', directive)])
+        self.assertEqual(registry.points(), [('point', directive)])
+        self.assertEqual(registry.scans, ['repoze.configuration.directive'])
+
+    def test_points_import_error(self):
+        directive = DummyDirective()
+        registry = self._makeOne(DummyPoint('point', directive, True))
+        self.assertEqual(registry.points(), [])
+
+    def test_points_lazy(self):
+        from repoze.configuration.registry import LazyDirective
+        directive = DummyDirective()
+        point = DummyPoint('point', directive, module_name='not.imported.yet')
+        registry = self._makeOne(point)
+        [(name, lazy)] = registry.points()
+        self.assertEqual(name, 'point')
+        self.failUnless(isinstance(lazy, LazyDirective))
+        self.assertEqual(point.loads, 0)
+        self.assertEqual(registry.tags(), {'!point':lazy})
+        self.assertEqual(point.loads, 0)
+
+    def test_points_module_imported(self):
+        directive = DummyDirective()
+        point = DummyPoint('point', directive,
+                           module_name='repoze.configuration.registry')
+        registry = self._makeOne(point)
+        self.assertEqual(registry.points(), [('point', directive)])
+        self.assertEqual(point.loads, 1)
+
+    def test_tags(self):
+        directive1 = DummyDirective()
+        directive2 = DummyDirective()
+        registry = self._makeOne(DummyPoint('point', directive1),
+                                 DummyPoint('tag:point', directive2))
+        self.assertEqual(registry.tags(),
+                         {'!point':directive1, 'tag:point':directive2})
+
+    def test_names_ambiguous(self):
+        from repoze.configuration.registry import _ambiguous
+        directive1 = DummyDirective()
+        directive2 = DummyDirective()
+        registry = self._makeOne(DummyPoint('point', directive1),
+                                 DummyPoint('point', directive2),
+                                 DummyPoint('other', directive2))
+        self.assertEqual(registry.names(),
+                         {'point':_ambiguous, 'other':directive2})
+
+    def test_derived(self):
+        registry = self._makeOne()
+        calls = []
+        def factory(reg):
+            calls.append(reg)
+            return 'derived'
+        self.assertEqual(registry.derived('key', factory), 'derived')
+        self.assertEqual(registry.derived('key', factory), 'derived')
+        self.assertEqual(calls, [registry])
+
+    def test_invalidate(self):
+        registry = self._makeOne(DummyPoint('point', DummyDirective()))
+        registry.tags()
+        registry.derived('key', lambda reg: 'derived')
+        registry.invalidate('ignored')
+        self.assertEqual(registry._derived, {})
+        registry.tags()
+        self.assertEqual(len(registry.scans), 2)
+
+class TestLazyDirective(unittest.TestCase):
+    def _makeOne(self, point):
+        from repoze.configuration.registry import LazyDirective
+        return LazyDirective(point)
+
+    def test_call_loads_once(self):
+        directive = DummyDirective()
+        point = DummyPoint('point', directive)
+        lazy = self._makeOne(point)
+        lazy('declaration1')
+        lazy('declaration2')
+        self.assertEqual(point.loads, 1)
+        self.assertEqual(directive.declaration, 'declaration2')
+        self.assertEqual(lazy.load(), directive)
+
+    def test_call_import_error(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        from repoze.configuration.declaration import PythonDeclaration
+        point = DummyPoint('point', DummyDirective(), True)
+        lazy = self._makeOne(point)
+        declaration = PythonDeclaration(None)
+        self.assertRaises(ConfigurationError, lazy, declaration)
+        self.assertRaises(ImportError, lazy.load)
+
+class Test_get_registry(unittest.TestCase):
+    def _callFUT(self):
+        from repoze.configuration.registry import get_registry
+        return get_registry()
+
+    def test_it(self):
+        from repoze.configuration.directives import include
+        registry = self._callFUT()
+        self.failUnless(registry is self._callFUT())
+        self.assertEqual(registry.tags()['!include'], include)
+
+class DummyDirective:
+    def __call__(self, declaration):
+        self.declaration = declaration
@@ -0,0 +1,62 @@
+import unittest
+
+class TestResolver(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.resolver import Resolver
+        return Resolver
+
+    def _makeOne(self):
+        return self._getTargetClass()()
+
+    def test_resolve_counts(self):
+        from repoze.configuration.tests.fixtures import fixturefunc
+        resolver = self._makeOne()
+        name = 'repoze.configuration.tests.fixtures:fixturefunc'
+        self.assertEqual(resolver.resolve(name), fixturefunc)
+        self.assertEqual(resolver.resolve(name), fixturefunc)
+        self.assertEqual((resolver.hits, resolver.misses), (1, 1))
+
+    def test_failure_not_cached(self):
+        resolver = self._makeOne()
+        name = 'repoze.configuration.tests.fixtures:nonexisting'
+        self.assertRaises(ImportError, resolver.resolve, name)
+        self.assertRaises(ImportError, resolver.resolve, name)
+        self.assertEqual((resolver.hits, resolver.misses), (0, 2))
+        self.assertEqual(resolver.cache, {})
+
+    def test_clear(self):
+        resolver = self._makeOne()
+        resolver.resolve('repoze.configuration')
+        resolver.clear()
+        self.assertEqual(resolver.cache, {})
+
+class Test_resolve_dotted(unittest.TestCase):
+    def _callFUT(self, dottedname):
+        from repoze.configuration.resolver import resolve_dotted
+        return resolve_dotted(dottedname)
+
+    def test_module(self):
+        from repoze.configuration.tests import fixtures
+        result = self._callFUT('repoze.configuration.tests.fixtures')
+        self.assertEqual(result, fixtures)
+
+    def test_module_attr(self):
+        from repoze.configuration.tests.fixtures import fixturefunc
+        result = self._callFUT(
+            'repoze.configuration.tests.fixtures:fixturefunc')
+        self.assertEqual(result, fixturefunc)
+
+    def test_nested_attrs(self):
+        import os
+        self.assertEqual(self._callFUT('os:path.join'), os.path.join)
+
+    def test_no_such_module(self):
+        self.assertRaises(ImportError, self._callFUT,
+                          'repoze.configuration.tests.nonexisting')
+
+    def test_attr_without_colon_is_module(self):
+        self.assertRaises(ImportError, self._callFUT,
+                          'repoze.configuration.tests.fixtures.fixturefunc')
+
+    def test_no_such_attr(self):
+        self.assertRaises(ImportError, self._callFUT, 'os:path.nonexisting')
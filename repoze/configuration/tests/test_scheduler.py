@@ -0,0 +1,111 @@
+import unittest
+
+class Test_action_graph(unittest.TestCase):
+    def _callFUT(self, actions):
+        from repoze.configuration.scheduler import action_graph
+        return action_graph(actions)
+
+    def test_barriers_are_serial(self):
+        actions = [DummyAction(), DummyAction(), DummyAction()]
+        self.assertEqual(self._callFUT(actions), [set(), set([0]), set([1])])
+
+    def test_declared_after_barrier(self):
+        actions = [DummyAction(), DummyAction('a', ()), DummyAction('b', ()),
+                   DummyAction()]
+        self.assertEqual(self._callFUT(actions),
+                         [set(), set([0]), set([0]), set([1, 2])])
+
+    def test_declared_dependencies(self):
+        actions = [DummyAction('a', ()), DummyAction('b', ['a']),
+                   DummyAction('c', ['a', 'b'])]
+        self.assertEqual(self._callFUT(actions),
+                         [set(), set([0]), set([0, 1])])
+
+    def test_unknown_dependency(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        actions = [DummyAction('a', ['nope'])]
+        self.assertRaises(ConfigurationError, self._callFUT, actions)
+
+class Test_execute_parallel(unittest.TestCase):
+    def _callFUT(self, actions, workers=4):
+        from repoze.configuration.scheduler import execute_parallel
+        return execute_parallel(actions, workers)
+
+    def test_no_actions(self):
+        self._callFUT([])
+
+    def test_dependencies_respected(self):
+        order = []
+        actions = [DummyAction('a', ['b'], order), DummyAction('b', (), order),
+                   DummyAction('c', ['a'], order), DummyAction(None, None, order),
+                   DummyAction('d', (), order)]
+        self._callFUT(actions)
+        self.failUnless(order.index('b') < order.index('a') < order.index('c'))
+        self.assertEqual(order[3:], [None, 'd'])
+
+    def test_independent_actions_run_concurrently(self):
+        import threading
+        # each action waits until the other has started: this can only
+        # finish if both run at the same time
+        started = [threading.Event(), threading.Event()]
+        def make_callback(mine, other):
+            def callback():
+                started[mine].set()
+                started[other].wait(5)
+                if not started[other].isSet():
+                    raise AssertionError('not concurrent')
+            return callback
+        actions = [DummyAction('a', (), callback=make_callback(0, 1)),
+                   DummyAction('b', (), callback=make_callback(1, 0))]
+        self._callFUT(actions, 2)
+
+    def test_failure(self):
+        from repoze.configuration.exceptions import ConfigurationExecutionError
+        order = []
+        def fail():
+            raise ValueError('broken')
+        actions = [DummyAction('a', (), order, callback=fail),
+                   DummyAction('b', ['a'], order)]
+        try:
+            self._callFUT(actions)
+        except ConfigurationExecutionError, e:
+            self.assertEqual(e.declaration, actions[0].declaration)
+            self.assertEqual(str(e), 'ValueError: broken\nlineinfo')
+        else:
+            self.fail('ConfigurationExecutionError not raised')
+        self.assertEqual(order, [])
+
+    def test_system_exit(self):
+        order = []
+        def exit():
+            raise SystemExit(3)
+        actions = [DummyAction('a', (), order, callback=exit),
+                   DummyAction('b', ['a'], order)]
+        self.assertRaises(SystemExit, self._callFUT, actions)
+        self.assertEqual(order, [])
+
+    def test_cycle(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        order = []
+        actions = [DummyAction('z', (), order), DummyAction('a', ['b'], order),
+                   DummyAction('b', ['a'], order)]
+        self.assertRaises(ConfigurationError, self._callFUT, actions)
+        self.assertEqual(order, [])
+
+class DummyAction:
+    def __init__(self, discriminator=None, depends=None, order=None,
+                 callback=None):
+        self.discriminator = discriminator
+        self.depends = depends
+        self.order = order
+        self.callback = callback
+        self.declaration = DummyDeclaration()
+
+    def execute(self):
+        if self.callback is not None:
+            self.callback()
+        if self.order is not None:
+            self.order.append(self.discriminator)
+
+class DummyDeclaration:
+    lineinfo = 'lineinfo'
@@ -0,0 +1,123 @@
+import unittest
+
+class TestSchema(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.schema import Schema
+        return Schema
+
+    def _makeOne(self, *fields, **kw):
+        return self._getTargetClass()(*fields, **kw)
+
+    def _makeSchema(self, **kw):
+        from repoze.configuration.schema import Boolean
+        from repoze.configuration.schema import Integer
+        from repoze.configuration.schema import String
+        from repoze.configuration.schema import Value
+        return self._makeOne(String('name', required=True),
+                             String('charset', 'utf-8'),
+                             Boolean('debug'),
+                             Integer('port', 8080),
+                             Value('hosts', types=(list,)),
+                             Value('anything'),
+                             **kw)
+
+    def test_ctor_bad_keyword(self):
+        self.assertRaises(TypeError, self._makeOne, bad=True)
+
+    def test_defaults(self):
+        schema = self._makeSchema()
+        result = schema.validate(DummyDeclaration({'name':'app'}))
+        self.assertEqual(result, {'name':'app', 'charset':'utf-8',
+                                  'debug':False, 'port':8080, 'hosts':None,
+                                  'anything':None})
+        self.assertEqual(result.name, 'app')
+        self.assertEqual(result.port, 8080)
+        self.assertRaises(AttributeError, getattr, result, 'nope')
+
+    def test_converted(self):
+        schema = self._makeSchema()
+        structure = {'name':'app', 'charset':'latin-1', 'debug':'Yes',
+                     'port':'80', 'hosts':['a'], 'anything':object()}
+        result = schema.validate(DummyDeclaration(structure))
+        self.assertEqual(result.charset, 'latin-1')
+        self.assertEqual(result.debug, True)
+        self.assertEqual(result.port, 80)
+        self.assertEqual(result.hosts, ['a'])
+        self.failUnless(result.anything is structure['anything'])
+
+    def test_boolean_not_string(self):
+        schema = self._makeSchema()
+        result = schema.validate(DummyDeclaration({'name':'app', 'debug':1}))
+        self.assertEqual(result.debug, True)
+        result = schema.validate(DummyDeclaration({'name':'app', 'debug':0}))
+        self.assertEqual(result.debug, False)
+
+    def test_not_a_mapping(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        schema = self._makeSchema()
+        declaration = DummyDeclaration(['name'])
+        self.assertRaises(ConfigurationError, schema.validate, declaration)
+
+    def test_every_error_reported(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        schema = self._makeSchema()
+        declaration = DummyDeclaration({'charset':1, 'port':'eighty',
+                                        'hosts':'a', 'bad':1, 'worse':2})
+        try:
+            schema.validate(declaration)
+        except ConfigurationError, e:
+            lines = str(e).split('\n')
+        else:
+            self.fail('ConfigurationError not raised')
+        self.assertEqual(lines[0], "Unknown key(s) in directive: "
+                         "['bad', 'worse']")
+        self.assertEqual(sorted(lines[1:4]), [
+            '"charset" attribute type is not one of the types '
+            "(<type 'basestring'>,): 1",
+            '"hosts" attribute type is not one of the types '
+            "(<type 'list'>,): 'a'",
+            'port with value eighty cannot be converted to an integer'])
+        self.assertEqual(lines[4:], ['"name" attribute is required',
+                                     'lineinfo'])
+
+    def test_explicit_null(self):
+        from repoze.configuration.schema import Integer
+        from repoze.configuration.schema import String
+        schema = self._makeOne(String('package'), Integer('port'))
+        structure = {'package':None, 'port':None}
+        result = schema.validate(DummyDeclaration(structure))
+        self.assertEqual(result, {'package':None, 'port':None})
+
+    def test_explicit_null_matches_accessors(self):
+        from repoze.configuration.declaration import PythonDeclaration
+        from repoze.configuration.schema import Integer
+        from repoze.configuration.schema import String
+        declaration = PythonDeclaration(None, package=None, port=None)
+        schema = self._makeOne(String('package'), Integer('port'))
+        result = schema.validate(declaration)
+        self.assertEqual((result.package, result.port),
+                         (declaration.string('package'),
+                          declaration.integer('port')))
+
+    def test_extra(self):
+        schema = self._makeSchema(extra=True)
+        result = schema.validate(DummyDeclaration({'name':'app', 'bad':1}))
+        self.assertEqual(result.bad, 1)
+
+    def test_integer_types(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        schema = self._makeSchema()
+        result = schema.validate(DummyDeclaration({'name':'app', 'port':81}))
+        self.assertEqual(result.port, 81)
+        declaration = DummyDeclaration({'name':'app', 'port':1.5})
+        self.assertRaises(ConfigurationError, schema.validate, declaration)
+
+class DummyDeclaration(object):
+    lineinfo = 'lineinfo'
+
+    def __init__(self, structure):
+        self.structure = structure
+
+    def error(self, msg):
+        from repoze.configuration.exceptions import ConfigurationError
+        raise ConfigurationError('%s\n%s' % (msg, self.lineinfo))
@@ -0,0 +1,98 @@
+import unittest
+
+from repoze.configuration.tests.helpers import TempdirMixin
+
+class Test_main(TempdirMixin, unittest.TestCase):
+    def _callFUT(self, *args):
+        import StringIO
+        from repoze.configuration.script import main
+        self.out = StringIO.StringIO()
+        self.err = StringIO.StringIO()
+        return main(['repoze-config'] + list(args), self.out, self.err,
+                    make_context)
+
+    def test_usage(self):
+        self.assertEqual(self._callFUT(), 2)
+        self.assertEqual(self._callFUT('nope', 'configure.yml'), 2)
+        self.failUnless(self.err.getvalue().startswith('Usage:'))
+
+    def test_check(self):
+        status = self._callFUT('check', '-p',
+                               'repoze.configuration.tests.fixtures',
+                               'configure.yml')
+        self.assertEqual(status, 0)
+        self.assertEqual(self.out.getvalue(), 'OK: 2 files, 0 actions\n')
+
+    def test_check_conflicts(self):
+        filename = self._writeFile('configure.yml',
+                                   '--- !setting\nname: a\n'
+                                   '--- !setting\nname: a\n'
+                                   '--- !setting\nname: b\n'
+                                   '--- !setting\nname: b\n')
+        self.assertEqual(self._callFUT('check', filename), 1)
+        error = self.err.getvalue()
+        self.failUnless(error.startswith(
+            'ConfigurationConflicts: Conflicting declarations (2 groups):'))
+        self.assertEqual(self.out.getvalue(), '')
+
+    def test_check_missing_file(self):
+        self.assertEqual(self._callFUT('check', '/nonexistent.yml'), 1)
+        self.failUnless(self.err.getvalue().startswith('IOError: '))
+
+    def test_check_missing_package(self):
+        self.assertEqual(self._callFUT('check', '-p', 'nonexistent.package',
+                                       'configure.yml'), 1)
+        self.failUnless(self.err.getvalue().startswith('ImportError: '))
+
+    def test_profile(self):
+        filename = self._writeFile('configure.yml',
+                                   '--- !setting\nname: a\n')
+        self.assertEqual(self._callFUT('profile', filename), 0)
+        lines = self.out.getvalue().splitlines()
+        self.assertEqual(lines[0].split(),
+                         ['time', 'self', 'dirs', 'acts', 'file'])
+        self.assertEqual(lines[1].split()[2:], ['1', '1', filename])
+        self.assertEqual(lines[3].split(), ['time', 'calls', 'directive'])
+        self.assertEqual(lines[4].split()[1:], ['1', '!setting'])
+
+    def test_bench(self):
+        filename = self._writeFile('configure.yml',
+                                   '--- !setting\nname: a\n')
+        self.assertEqual(self._callFUT('bench', '-n', '2', filename), 0)
+        lines = self.out.getvalue().splitlines()
+        self.assertEqual([ line.split()[0] for line in lines ],
+                         ['load', 'execute'])
+        self.failUnless(lines[0].endswith('(2 runs)'))
+
+    def test_bench_no_runs(self):
+        filename = self._writeFile('configure.yml',
+                                   '--- !setting\nname: a\n')
+        self.assertEqual(self._callFUT('bench', '-n', '0', filename), 2)
+        self.assertEqual(self.out.getvalue(), '')
+        self.failUnless(self.err.getvalue().endswith(
+            '--repeat must be at least 1\n'))
+
+    def test_stats(self):
+        filename = self._writeFile('configure.yml',
+                                   '--- !setting\nname: a\n'
+                                   '--- !setting\nname: b\n'
+                                   '--- !setting\n{}\n')
+        self.assertEqual(self._callFUT('stats', filename), 0)
+        self.assertEqual(self.out.getvalue(),
+                         'files:                 1\n'
+                         'file loads:            1\n'
+                         'actions:               3\n'
+                         'discriminated actions: 2\n'
+                         'discriminators:        2\n')
+
+def setting(declaration):
+    name = declaration.structure.get('name')
+    discriminator = None
+    if name is not None:
+        discriminator = ('setting', name)
+    declaration.action(lambda: None, discriminator=discriminator)
+
+def make_context(**kw):
+    from repoze.configuration.context import Context
+    from repoze.configuration.tests.helpers import make_loader
+    return Context(_loader=make_loader(setting=setting), **kw)
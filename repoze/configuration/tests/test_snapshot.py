@@ -0,0 +1,121 @@
+import unittest
+
+from repoze.configuration.tests.helpers import TempdirMixin
+
+class TestSnapshot(TempdirMixin, unittest.TestCase):
+    def _makeContext(self, cache, executed, loader=None, **data):
+        from repoze.configuration.context import Context
+        from repoze.configuration.tests.helpers import make_loader
+        def setting(declaration):
+            name = declaration.structure.pop('name')
+            value = declaration.structure['value']
+            def callback():
+                executed.append((name, value))
+            declaration.action(callback, discriminator=name)
+        Loader = make_loader(setting=setting)
+        if loader is None:
+            loader = Loader
+        else:
+            loader.registry = Loader.registry
+        return Context(data, _loader=loader, _cache=cache)
+
+    def _writeTree(self):
+        root = self._writeFile(
+            'root.yml',
+            '--- !setting\nname: a\nvalue: "%(greeting)s"\n'
+            '--- !include\nfilename: "%(here)s/child.yml"\n'
+            '--- !setting\nname: c\nvalue: 3\n')
+        self._writeFile('child.yml', '--- !setting\nname: b\nvalue: 2\n')
+        return root
+
+    def _snapshot(self, cache=None, **data):
+        import os
+        from repoze.configuration.snapshot import SnapshotRecorder
+        from repoze.configuration.snapshot import snapshot
+        root = self._writeTree()
+        executed = []
+        context = self._makeContext(SnapshotRecorder(cache), executed,
+                                    greeting='hello', **data)
+        context.load(root, None)
+        context.execute()
+        filename = os.path.join(self.tempdir, 'snapshot')
+        snapshot(context, filename)
+        return filename, executed
+
+    def _restore(self, filename, executed, **data):
+        from repoze.configuration.snapshot import restore
+        def loader(context, stream, **kw):
+            raise AssertionError('parsed')
+        context = self._makeContext(None, executed, loader, **data)
+        return restore(filename, context)
+
+    def test_restore_without_parsing(self):
+        filename, executed = self._snapshot()
+        self.assertEqual(executed, [('a', 'hello'), ('b', 2), ('c', 3)])
+        restored = []
+        context = self._restore(filename, restored)
+        self.assertEqual(context['greeting'], 'hello')
+        self.assertEqual(sorted(context.discriminators), ['a', 'b', 'c'])
+        self.assertEqual(context.actions[1].declaration.span[0],
+                         self.tempdir + '/child.yml')
+        context.execute()
+        self.assertEqual(restored, executed)
+
+    def test_snapshot_with_cache_hits(self):
+        from repoze.configuration.cache import MemoryParseCache
+        cache = MemoryParseCache()
+        self._snapshot(cache)
+        filename, executed = self._snapshot(cache)
+        restored = []
+        self._restore(filename, restored).execute()
+        self.assertEqual(restored, executed)
+
+    def test_unpicklable_item(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        filename, executed = self._snapshot(lock=DummyUnpicklable())
+        self.assertRaises(ConfigurationError, self._restore, filename, [])
+        context = self._restore(filename, [], lock='supplied')
+        self.assertEqual(context['lock'], 'supplied')
+
+    def test_stale(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        from repoze.configuration.snapshot import restore
+        filename, executed = self._snapshot()
+        context = self._makeContext(None, [])
+        context.directives = dict(context.get_directives())
+        context.directives['!setting'] = lambda declaration: None
+        self.assertRaises(ConfigurationError, restore, filename, context)
+
+    def test_not_recorded(self):
+        import os
+        from repoze.configuration.exceptions import ConfigurationError
+        from repoze.configuration.snapshot import snapshot
+        context = self._makeContext(None, [])
+        self.assertRaises(ConfigurationError, snapshot, context,
+                          os.path.join(self.tempdir, 'snapshot'))
+
+class TestSnapshotCache(unittest.TestCase):
+    def _makeOne(self, files):
+        from repoze.configuration.snapshot import SnapshotCache
+        return SnapshotCache(files)
+
+    def test_lookup(self):
+        import cPickle
+        declarations = [('!foo', {'a':1}, ('/a.yml', 0, 1, 0, 0))]
+        cache = self._makeOne(
+            {('/a.yml', None, False):cPickle.dumps(declarations, 2)})
+        frame = {'package':None, 'override':False}
+        entry = cache.lookup(None, '/a.yml', frame)
+        self.assertEqual(entry.declarations, declarations)
+        self.failIf(cache.lookup(None, '/a.yml', frame).declarations
+                    is entry.declarations)
+
+    def test_lookup_missing(self):
+        from repoze.configuration.exceptions import ConfigurationError
+        cache = self._makeOne({})
+        self.assertRaises(ConfigurationError, cache.lookup, None, '/a.yml',
+                          {'package':None, 'override':False})
+
+class DummyUnpicklable(object):
+    def __reduce__(self):
+        raise TypeError('unpicklable')
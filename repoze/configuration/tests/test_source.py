@@ -0,0 +1,96 @@
+import unittest
+
+class TestSourceCache(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tempdir)
+
+    def _getTargetClass(self):
+        from repoze.configuration.source import SourceCache
+        return SourceCache
+
+    def _makeOne(self):
+        return self._getTargetClass()()
+
+    def test_text_read_once(self):
+        import os
+        filename = os.path.join(self.tempdir, 'a.yml')
+        f = open(filename, 'w')
+        f.write('--- !foo\n')
+        f.close()
+        sources = self._makeOne()
+        self.assertEqual(sources.text(filename), '--- !foo\n')
+        os.remove(filename)
+        self.assertEqual(sources.text(filename), '--- !foo\n')
+
+    def test_text_unreadable(self):
+        sources = self._makeOne()
+        self.assertEqual(sources.text('/nonexistent/a.yml'), None)
+
+    def test_register(self):
+        sources = self._makeOne()
+        sources.register('<memory>', 'text')
+        self.assertEqual(sources.text('<memory>'), 'text')
+
+class TestSourceBuffer(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.source import SourceBuffer
+        return SourceBuffer
+
+    def _makeOne(self, name='name', text='--- !foo\n'):
+        return self._getTargetClass()(name, text)
+
+    def test_read_all(self):
+        text = '--- !foo\n'
+        buffer = self._makeOne(text=text)
+        self.assertEqual(buffer.name, 'name')
+        self.failUnless(buffer.read() is text)
+        self.assertEqual(buffer.read(), '')
+
+    def test_read_chunks(self):
+        buffer = self._makeOne()
+        self.assertEqual(buffer.read(4), '--- ')
+        self.assertEqual(buffer.read(100), '!foo\n')
+        self.assertEqual(buffer.read(4), '')
+        buffer.close()
+
+class TestSourceSpan(unittest.TestCase):
+    def _getTargetClass(self):
+        from repoze.configuration.source import SourceSpan
+        return SourceSpan
+
+    def _makeOne(self, filename='<memory>', start=4, end=13, start_line=0,
+                 end_line=1):
+        return self._getTargetClass()(filename, start, end, start_line,
+                                      end_line)
+
+    def test_tuple(self):
+        span = self._makeOne()
+        self.assertEqual(span, ('<memory>', 4, 13, 0, 1))
+        self.assertEqual(span.filename, '<memory>')
+
+    def test_pickle(self):
+        import cPickle
+        span = self._makeOne()
+        for protocol in (0, 2):
+            result = cPickle.loads(cPickle.dumps(span, protocol))
+            self.assertEqual(result, span)
+            self.assertEqual(result.__class__, self._getTargetClass())
+
+    def test_lineinfo_registered(self):
+        from repoze.configuration.source import SourceCache
+        sources = SourceCache()
+        sources.register('<memory>', '--- !foo\na: 1\n')
+        span = self._makeOne()
+        self.assertEqual(span.snippet(sources), '!foo\na: 1')
+        self.assertEqual(span.lineinfo(sources),
+                         '!foo\na: 1 in lines 1-2 of file "<memory>"')
+
+    def test_lineinfo_unreadable(self):
+        span = self._makeOne()
+        self.assertEqual(span.snippet(), None)
+        self.assertEqual(span.lineinfo(), 'lines 1-2 of file "<memory>"')
@@ -0,0 +1,82 @@
+import unittest
+
+from repoze.configuration.tests.helpers import TempdirMixin
+from repoze.configuration.tests.helpers import make_loader
+
+class Test_validate(TempdirMixin, unittest.TestCase):
+    def _callFUT(self, roots, processes=1, loader=None):
+        from repoze.configuration.validate import validate
+        return validate(roots, processes, loader)
+
+    def test_ok(self):
+        from repoze.configuration.tests import fixtures
+        roots = [('configure.yml', fixtures),
+                 ('configure.yml', 'repoze.configuration.tests.fixtures')]
+        self.assertEqual(self._callFUT(roots), [(roots[0], None),
+                                                (roots[1], None)])
+
+    def test_errors(self):
+        roots = ['/nonexistent.yml', ('configure.yml', 'nonexistent.package')]
+        results = self._callFUT(roots)
+        self.assertEqual([ root for root, error in results ], roots)
+        self.failUnless(results[0][1].startswith('IOError: '))
+        self.failUnless(results[1][1].startswith('ImportError: '))
+
+    def test_conflicts(self):
+        conflicts = self._writeFile('conflicts.yml',
+                                    '--- !setting\nname: a\n'
+                                    '--- !setting\nname: a\n'
+                                    '--- !setting\nname: b\n'
+                                    '--- !setting\nname: b\n')
+        [(root, error)] = self._callFUT([conflicts], loader=loader)
+        self.failUnless(error.startswith(
+            'ConfigurationConflicts: Conflicting declarations (2 groups):'))
+        self.assertEqual(error.count('of file "%s"' % conflicts), 4)
+
+    def test_pool(self):
+        ok = self._writeFile('ok.yml', '--- !setting\nname: a\n')
+        conflicts = self._writeFile('conflicts.yml',
+                                    '--- !setting\nname: a\n'
+                                    '--- !setting\nname: a\n')
+        results = self._callFUT([ok, conflicts, ok], 2, loader)
+        self.assertEqual([ root for root, error in results ],
+                         [ok, conflicts, ok])
+        self.assertEqual(results[0][1], None)
+        self.failUnless(results[1][1].startswith('ConfigurationConflicts: '))
+        self.assertEqual(results[2][1], None)
+
+class Test_script_validate(unittest.TestCase):
+    def _callFUT(self, *args):
+        import StringIO
+        from repoze.configuration.script import main
+        self.out = StringIO.StringIO()
+        self.err = StringIO.StringIO()
+        return main(['repoze-config', 'validate'] + list(args), self.out,
+                    self.err)
+
+    def test_ok(self):
+        status = self._callFUT('-j', '1', '-p',
+                               'repoze.configuration.tests.fixtures',
+                               'configure.yml', 'another.yml')
+        self.assertEqual(status, 0)
+        self.assertEqual(self.out.getvalue(), '0 of 2 configurations failed\n')
+
+    def test_failed(self):
+        status = self._callFUT('-j', '1', '/nonexistent.yml')
+        self.assertEqual(status, 1)
+        lines = self.out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'FAILED /nonexistent.yml')
+        self.failUnless(lines[2].startswith('    IOError: '))
+        self.assertEqual(lines[-1], '1 of 1 configurations failed')
+
+def setting(declaration):
+    name = declaration.structure['name']
+    declaration.action(None, discriminator=('setting', name))
+
+Loader = make_loader(setting=setting)
+
+def loader(context, stream, **kw):
+    # a module-level function: pickled to the worker processes
+    return Loader(context, stream, **kw)
+
+loader.registry = Loader.registry
@@ -0,0 +1,61 @@
+import multiprocessing
+import sys
+
+from repoze.configuration.context import Context
+from repoze.configuration.resolver import Resolver
+
+def validate(roots, processes=None, loader=None):
+    """ Load each configuration root in ``roots`` without executing it,
+    and return a list of ``(root, error)`` pairs, in the order of
+    ``roots``.  ``error`` is ``None`` if the root loaded without error,
+    otherwise a message describing the error (for configuration errors,
+    including the location of each declaration involved).  Every
+    discriminator conflict in a root is reported, not just the first.
+
+    A root is a filename, or a ``(filename, package)`` pair where
+    ``package`` is a package or its dotted name.  Roots are loaded in a
+    pool of ``processes`` worker processes (``None`` or ``0`` means one
+    per CPU), unless ``processes`` is ``1``: then they are loaded in
+    this process.  Each worker loads many roots, reusing the directive
+    registry and a resolver cache.  ``loader`` must be picklable."""
+    roots = list(roots)
+    normalized = [ _normalize(root) for root in roots ]
+    if processes == 1:
+        _init_worker(loader)
+        errors = map(_validate_root, normalized)
+    else:
+        pool = multiprocessing.Pool(processes or None, _init_worker, (loader,))
+        try:
+            errors = pool.map(_validate_root, normalized, 1)
+        finally:
+            pool.close()
+            pool.join()
+    return zip(roots, errors)
+
+def _normalize(root):
+    if isinstance(root, basestring):
+        return (root, None)
+    filename, package = root
+    if package is not None and not isinstance(package, basestring):
+        package = package.__name__
+    return (filename, package)
+
+_worker = {}
+
+def _init_worker(loader):
+    _worker['loader'] = loader
+    _worker['resolver'] = Resolver()
+
+def _validate_root(root):
+    filename, package_name = root
+    try:
+        package = None
+        if package_name is not None:
+            __import__(package_name)
+            package = sys.modules[package_name]
+        context = Context(_loader=_worker['loader'],
+                          _resolver=_worker['resolver'],
+                          _collect_conflicts=True)
+        context.load(filename, package)
+    except Exception, why:
+        return '%s: %s' % (why.__class__.__name__, why)
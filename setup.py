@@ -54,6 +54,8 @@ setup(name='repoze.configuration',
       entry_points = """\
       [repoze.configuration.directive]
       include = repoze.configuration.directives:include
+      [console_scripts]
+      repoze-config = repoze.configuration.script:main
       """,
       extras_require = {
         'testing':  requires + testing_extras,